@@ -0,0 +1,30 @@
+import argparse
+import random
+from benchmark import best_of
+from block import block_to_block_type, block_to_html_node
+from corpus import CorpusOptions, generate_block
+
+CORPORA = {
+    "list-heavy": CorpusOptions(list_density=0.8, code_density=0.05),
+    "paragraph-heavy": CorpusOptions(list_density=0.02, code_density=0.02),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-block cost of block classification and conversion.")
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'corpus':<16} {'classify us':>12} {'convert us':>11}")
+    for name, options in CORPORA.items():
+        rng = random.Random(args.seed)
+        blocks = [generate_block(rng, options) for _ in range(args.blocks)]
+        classify = best_of(args.repeat, lambda: [block_to_block_type(b) for b in blocks])
+        convert = best_of(args.repeat, lambda: [block_to_html_node(b) for b in blocks])
+        print(f"{name:<16} {classify / len(blocks) * 1e6:>12.2f} {convert / len(blocks) * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
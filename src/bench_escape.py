@@ -0,0 +1,78 @@
+import argparse
+import random
+import htmlnode
+from htmlnode import HTMLNode, LeafNode
+from benchmark import best_of
+from block import markdown_to_html_node
+from corpus import CorpusOptions, generate_block
+from template import basepath_rewriter
+
+
+# The serializer as it was before escaping: values are inserted as they are
+# and attribute fragments are rebuilt for every node.
+def raw_props_to_html(self, rewrite_url=None):
+    if self.props is None:
+        return ""
+    html_string = ""
+    for key in self.props:
+        value = self.props[key]
+        if rewrite_url is not None and key in htmlnode.URL_ATTRIBUTES:
+            value = rewrite_url(value)
+        html_string += " " + f'{key}="{value}"'
+    return html_string
+
+
+def raw_leaf_to_html(self, rewrite_url=None):
+    if self.tag in ("img", "br", "hr"):
+        return f"<{self.tag}{self.props_to_html(rewrite_url)}>"
+    if self.value is None:
+        raise ValueError("All LeafNode's must have a value")
+    elif self.tag is None:
+        return self.value
+    return f"<{self.tag}{self.props_to_html(rewrite_url)}>{self.value}</{self.tag}>"
+
+
+def unescaped(func):
+    props_to_html, leaf_to_html = HTMLNode.props_to_html, LeafNode.to_html
+    HTMLNode.props_to_html, LeafNode.to_html = raw_props_to_html, raw_leaf_to_html
+    try:
+        return func()
+    finally:
+        HTMLNode.props_to_html, LeafNode.to_html = props_to_html, leaf_to_html
+
+
+def documents(pages, blocks, special_density, seed):
+    rng = random.Random(seed)
+    options = CorpusOptions(code_density=0.05)
+    docs = []
+    for _ in range(pages):
+        text = "\n\n".join(generate_block(rng, options) for _ in range(blocks))
+        words = text.split(" ")
+        for i in range(len(words)):
+            if words[i].isalpha() and rng.random() < special_density:
+                words[i] = rng.choice(["a<b", "R&D", "x>y"])
+        docs.append(" ".join(words))
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of escaping relative to the unescaped serializer.")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--basepath", default="/static_site/")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rewrite_url = basepath_rewriter(args.basepath)
+    print(f"{'corpus':<14} {'unescaped ms':>13} {'escaped ms':>11} {'overhead':>9}")
+    for name, density in (("plain text", 0.0), ("1% special", 0.01), ("10% special", 0.1)):
+        nodes = [markdown_to_html_node(d) for d in documents(args.pages, args.blocks, density, args.seed)]
+        serialize = lambda: [node.to_html(rewrite_url) for node in nodes]
+        raw = unescaped(lambda: best_of(args.repeat, serialize))
+        escaped = best_of(args.repeat, serialize)
+        print(f"{name:<14} {raw * 1000:>13.1f} {escaped * 1000:>11.1f} {(escaped / raw - 1) * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import tempfile
+import tracemalloc
+from block import block_to_html_node
+from corpus import CorpusOptions, generate_site
+from generate_page import collect_pages
+from htmlnode import ParentNode
+from splitblocks import markdown_to_blocks
+
+
+def build_trees(documents):
+    # Bypasses the block cache so every node is allocated and kept alive.
+    return [ParentNode("div", [block_to_html_node(b) for b in markdown_to_blocks(d)]) for d in documents]
+
+
+def count_nodes(trees):
+    count = 0
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory held by the rendered node trees.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content, _ = generate_site(root, CorpusOptions(pages=args.pages, blocks=args.blocks, seed=args.seed))
+        documents = []
+        for from_path, _ in collect_pages(content, os.path.join(root, "public")):
+            with open(from_path) as f:
+                documents.append(f.read())
+
+    build_trees(documents[:1])
+    tracemalloc.start()
+    trees = build_trees(documents)
+    retained = tracemalloc.get_traced_memory()[0]
+    nodes = count_nodes(trees)
+    del trees
+
+    # One page at a time, as a build renders them: the peak is the largest
+    # single tree plus whatever intermediate lists it took to build it.
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for document in documents:
+        build_trees([document])
+    page_peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    print(f"{len(documents)} pages, {nodes} nodes")
+    print(f"all trees retained: {retained / 1024:10.1f} KiB ({retained / nodes:.0f} bytes/node)")
+    print(f"peak per page:      {page_peak / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
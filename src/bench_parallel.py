@@ -0,0 +1,36 @@
+import argparse
+import os
+import tempfile
+import time
+from block import block_cache, highlight_cache
+from corpus import CorpusOptions, generate_site
+from generate_page import generate_pages_recursive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time page rendering against worker count.")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content, template = generate_site(root, CorpusOptions(pages=args.pages, blocks=args.blocks))
+        baseline = None
+        print(f"{'jobs':>4} {'seconds':>8} {'pages/s':>8} {'speedup':>8}")
+        for jobs in range(1, args.max_jobs + 1):
+            dest = os.path.join(root, f"public{jobs}")
+            # Every run starts cold: forked workers would inherit blocks the
+            # previous run cached.
+            block_cache.clear()
+            highlight_cache.clear()
+            start = time.perf_counter()
+            generate_pages_recursive(content, template, dest, "/", jobs=jobs)
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline = elapsed
+            print(f"{jobs:>4} {elapsed:>8.2f} {args.pages / elapsed:>8.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import time
+from block import markdown_to_html_node
+from template import Template, basepath_rewriter
+
+
+def replace_chain(template_string, heading, html_string, basepath):
+    html = template_string.replace("{{ Title }}", heading)
+    html = html.replace("{{ Content }}", html_string)
+    html = html.replace('href="/', f'href="{basepath}')
+    html = html.replace('src="/', f'src="{basepath}')
+    return html
+
+
+def compiled(template, heading, html_string, rewrite_url):
+    return template.render({"Title": heading, "Content": html_string}, rewrite_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the template replace chain with compiled templates.")
+    parser.add_argument("--template", default="./template.html")
+    parser.add_argument("--blocks", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--basepath", default="/static_site/")
+    args = parser.parse_args()
+
+    with open(args.template) as f:
+        template_string = f.read()
+    md = "\n\n".join(f"Paragraph {i} with a [link](/page{i}) and **bold** text." for i in range(args.blocks))
+    html_string = markdown_to_html_node(md).to_html()
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        with open(args.template) as f:
+            replace_chain(f.read(), "Title", html_string, args.basepath)
+    chain = time.perf_counter() - start
+
+    template = Template(template_string)
+    rewrite_url = basepath_rewriter(args.basepath)
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        compiled(template, "Title", html_string, rewrite_url)
+    fast = time.perf_counter() - start
+
+    per_page = 1e6 / args.iterations
+    print(f"page size: {len(html_string)} chars, {args.iterations} renders")
+    print(f"read + replace chain: {chain * per_page:8.1f} us/page")
+    print(f"compiled template:    {fast * per_page:8.1f} us/page ({chain / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
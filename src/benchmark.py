@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from block import BlockType, block_cache, block_to_block_type, highlight_cache, markdown_to_html_node
+from corpus import CorpusOptions, generate_site
+from generate_page import collect_pages, generate_pages_recursive
+from splitblocks import markdown_to_blocks
+from text_to_textnodes import text_to_textnodes
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def inline_texts(blocks):
+    texts = []
+    for block in blocks:
+        block_type = block_to_block_type(block)
+        lines = block.split("\n")
+        if block_type == BlockType.PARAGRAPH:
+            texts.append(" ".join(lines))
+        elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+            texts.extend(line.split(" ", 1)[1] for line in lines)
+        elif block_type == BlockType.QUOTE:
+            texts.append(" ".join(line.lstrip(">").strip() for line in lines))
+        elif block_type == BlockType.HEADING:
+            texts.append(block.lstrip("#").strip())
+    return texts
+
+
+def run_benchmarks(options, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        content, template = generate_site(root, options)
+        documents = []
+        for from_path, _ in collect_pages(content, os.path.join(root, "public")):
+            with open(from_path) as f:
+                documents.append(f.read())
+        blocks = [block for document in documents for block in markdown_to_blocks(document)]
+        texts = inline_texts(blocks)
+        nodes = [markdown_to_html_node(document) for document in documents]
+
+        def full_build():
+            block_cache.clear()
+            highlight_cache.clear()
+            generate_pages_recursive(content, template, os.path.join(root, "public"), "/")
+
+        cases = [
+            ("markdown_to_blocks", len(documents), lambda: [markdown_to_blocks(d) for d in documents]),
+            ("block_to_block_type", len(blocks), lambda: [block_to_block_type(b) for b in blocks]),
+            ("text_to_textnodes", len(texts), lambda: [text_to_textnodes(t) for t in texts]),
+            ("to_html", len(nodes), lambda: [node.to_html() for node in nodes]),
+            ("generate_pages_recursive", len(documents), full_build),
+        ]
+        for name, items, func in cases:
+            seconds = best_of(repeat, func)
+            results[name] = {"seconds": seconds, "items": items, "per_item_us": seconds / items * 1e6}
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    lines = [f"{'benchmark':<26} {'seconds':>9} {'us/item':>9} {'baseline':>9} {'change':>8}"]
+    for name, result in results.items():
+        line = f"{name:<26} {result['seconds']:>9.4f} {result['per_item_us']:>9.2f}"
+        previous = baseline.get(name) if baseline else None
+        if previous:
+            change = (result["per_item_us"] - previous["per_item_us"]) / previous["per_item_us"]
+            marker = ""
+            if change > threshold:
+                marker = " REGRESSION"
+                regressions.append(name)
+            line += f" {previous['per_item_us']:>9.2f} {change * 100:>+7.1f}%{marker}"
+        lines.append(line)
+    return "\n".join(lines), regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the renderer on a synthetic site.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--list-density", type=float, default=0.2)
+    parser.add_argument("--code-density", type=float, default=0.1)
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--nesting", type=int, default=2, help="directory depth of the content tree")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best is kept")
+    parser.add_argument(
+        "--baseline", default="bench_baseline.json",
+        help="results to compare against; create it on this machine with --save-baseline",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    options = CorpusOptions(
+        args.pages, args.blocks, args.list_density, args.code_density,
+        args.link_density, args.nesting, args.seed,
+    )
+    # Timings only compare on the machine that recorded them, so no baseline
+    # is shipped; without a usable one the check fails instead of passing.
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("corpus") == options.to_dict():
+            baseline = stored["results"]
+        elif not args.save_baseline:
+            parser.error(f"{args.baseline} is for other corpus options; record it anew with --save-baseline")
+    elif not args.save_baseline:
+        parser.error(f"no baseline at {args.baseline}; record one with --save-baseline first")
+
+    results = run_benchmarks(options, args.repeat)
+    report, regressions = compare(results, baseline, args.threshold)
+    print(report)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"corpus": options.to_dict(), "results": results}, f, indent=1)
+        print(f"Saved baseline to {args.baseline}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+from collections import Counter
 from enum import Enum
-from splitblocks import markdown_to_blocks
-from htmlnode import HTMLNode, LeafNode, ParentNode
-from text_to_textnodes import text_to_textnodes
-from textnode import text_node_to_html_node, TextNode, TextType
+from splitblocks import iter_numbered_blocks, markdown_to_blocks
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode
+from inline_scanner import scan_inline
+from textnode import token_to_html_node, TextType
+from render_cache import BlockCache
+from highlight import highlight
+from link_index import block_links
+from search_index import token_terms, trim_terms
 import re 
 
 class BlockType(Enum):
@@ -14,103 +19,124 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 def block_to_block_type(block): 
+    return classify_block(block)[0]
+
+
+# Only one block type can match a given first character, so that candidate
+# alone is validated, in a single pass over the block. The lines are returned
+# for the converter so the block is split only once.
+def classify_block(block):
     lines = block.split("\n")
-    first_line = lines[0]
-
-    # code 
-    if len(lines) >= 2 and lines[0] == "```" and lines[-1] == "```": 
-        return BlockType.CODE 
-    
-    # quote 
-    all_lines_are_quote = True 
-    for line in lines: 
-        if not line.startswith(">"):
-            all_lines_are_quote = False
-            break 
-    if all_lines_are_quote:
-        return BlockType.QUOTE
-    
-    # unordered 
-    all_unordered = True 
+    first = block[:1]
+    if first == "`":
+        if len(lines) >= 2 and lines[-1] == "```" and is_fence_opening(lines[0]):
+            return BlockType.CODE, lines
+    elif first == ">":
+        if block.count("\n>") == len(lines) - 1:
+            return BlockType.QUOTE, lines
+    elif first == "-":
+        if block.startswith("- ") and block.count("\n- ") == len(lines) - 1:
+            return BlockType.UNORDERED_LIST, lines
+    elif first == "1":
+        if is_ordered_list(lines):
+            return BlockType.ORDERED_LIST, lines
+    elif first == "#":
+        first_line = lines[0]
+        level = len(first_line) - len(first_line.lstrip("#"))
+        if level <= 6 and first_line[level : level + 1] == " ":
+            return BlockType.HEADING, lines
+    return BlockType.PARAGRAPH, lines
+
+
+FENCE_LANGUAGE_PATTERN = re.compile(r"[\w+#.-]+")
+
+# A fence opens with ``` and an optional language name: "```python".
+def is_fence_opening(line):
+    return line == "```" or (line.startswith("```") and FENCE_LANGUAGE_PATTERN.fullmatch(line, 3) is not None)
+
+
+ORDERED_PREFIXES = ["0. "]
+
+def is_ordered_list(lines):
+    while len(ORDERED_PREFIXES) <= len(lines):
+        ORDERED_PREFIXES.append(f"{len(ORDERED_PREFIXES)}. ")
+    number = 1
     for line in lines:
-        if not line.startswith("- "):
-            all_unordered = False
-            break 
-    if all_unordered:
-        return BlockType.UNORDERED_LIST
-        
-    # ordered 
-    expected = 1 
-    all_ordered = True 
-    for line in lines: 
-        prefix = f"{expected}. "
-        if not line.startswith(prefix):
-            all_ordered = False
-            break 
-        expected += 1
-    
-    if all_ordered:
-        return BlockType.ORDERED_LIST
-
-
-    # headings 
-    count = 0
-    for ch in first_line: 
-        if ch == "#":
-            count += 1
-        else: 
-            break 
-    if len(first_line) > count and 1 <= count <= 6 and first_line[count] == " ": 
-        return BlockType.HEADING
-    
-    return BlockType.PARAGRAPH
+        if not line.startswith(ORDERED_PREFIXES[number]):
+            return False
+        number += 1
+    return True
 
 
 # Block to HTML 
 
+block_cache = BlockCache()
+highlight_cache = BlockCache()
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    children = [node for node, _, _ in render_blocks(markdown)]
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
-
-
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        children.append(html_node)
-    return children
-
-
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+# The (node, terms, urls) of every block of the document (see render_block).
+def render_blocks(markdown):
+    return [block_cache.render(block, render_block) for block in markdown_to_blocks(markdown)]
+
+
+# A block's node, with the terms and the link and image urls of its inline
+# tokens, collected while the node is built and cached with it, so a cached
+# block is neither walked nor counted again.
+def render_block(block):
+    tokens = []
+    node = block_to_html_node(block, tokens)
+    return node, token_terms(tokens), tuple(url for _, _, url in tokens if url is not None)
+
+
+# Renders the same markup as markdown_to_html_node(...).to_html(), one block
+# at a time, so only the current block's nodes are alive. Blocks bypass the
+# block cache, which would otherwise keep every block of the document. The
+# links of each block are passed on the way to links, anything with an
+# extend() method (a list by default); its terms are counted into a
+# Counter kept to a bounded size (see trim_terms).
+class MarkdownStream:
+    def __init__(self, lines, links=None):
+        self.lines = lines
+        self.links = links if links is not None else []
+        self.terms = Counter()
+
+    def emit_html(self, write, rewrite_url=None):
+        write("<div>")
+        for first_line, block in iter_numbered_blocks(self.lines):
+            node, terms, urls = render_block(block)
+            node.emit_html(write, rewrite_url)
+            self.links.extend(block_links(first_line, block, urls))
+            self.terms.update(terms.split())
+            self.terms = trim_terms(self.terms)
+        write("</div>")
+
+
+# The inline tokens the block is built from are added to tokens, if given.
+def block_to_html_node(block, tokens=None):
+    block_type, lines = classify_block(block)
+    return BLOCK_CONVERTERS[block_type](block, lines, tokens)
+
+
+def text_to_children(text, tokens=None):
+    scanned = scan_inline(text)
+    if tokens is not None:
+        tokens.extend(scanned)
+    return [token_to_html_node(*token) for token in scanned]
+
+
+def paragraph_to_html_node(block, lines, tokens=None):
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, tokens)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+HEADING_TAGS = ("h0", "h1", "h2", "h3", "h4", "h5", "h6")
+
+def heading_to_html_node(block, lines, tokens=None):
     level = 0
     for char in block:
         if char == "#":
@@ -120,53 +146,73 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    children = text_to_children(text, tokens)
+    return ParentNode(HEADING_TAGS[level], children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(block, lines, tokens=None):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
-    text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
+    language = lines[0][3:]
+    text = block[len(lines[0]) + 1 : -3]
+    if language:
+        html = highlight_cache.render(f"{language}\n{text}", highlight_block)
+        if html is not None:
+            code = ParentNode("code", [RawNode(html)], {"class": f"language-{language}"})
+            return ParentNode("pre", [code])
+    child = token_to_html_node(TextType.TEXT, text)
     code = ParentNode("code", [child])
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+# Keyed by language and code body, so a snippet repeated across pages is
+# highlighted once; None marks a language without a highlighter.
+def highlight_block(key):
+    language, text = key.split("\n", 1)
+    return highlight(text, language)
+
+
+def olist_to_html_node(block, lines, tokens=None):
     html_items = []
-    for item in items:
+    for item in lines:
         parts = item.split(". ", 1)
         text = parts[1]
-        children = text_to_children(text)
+        children = text_to_children(text, tokens)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, lines, tokens=None):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(text, tokens)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(block, lines, tokens=None):
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, tokens)
     return ParentNode("blockquote", children)
 
 
+
+BLOCK_CONVERTERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: ulist_to_html_node,
+    BlockType.ORDERED_LIST: olist_to_html_node,
+}
+
+
 # def markdown_to_html_node(markdown):
 #     blocks = markdown_to_blocks(markdown)
 #     html_blocks = [] 
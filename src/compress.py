@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from manifest import remove_empty_dirs
+from page_writer import write_if_changed
+from static_sync import format_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".md")
+
+
+def gzip_compress(data):
+    # mtime=0 keeps the sidecar identical across builds of the same content.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+ENCODINGS = [(".gz", gzip_compress)]
+if brotli is not None:
+    ENCODINGS.append((".br", brotli_compress))
+SIDECAR_SUFFIXES = (".gz", ".br")
+
+
+class CompressStats:
+    def __init__(self):
+        self.compressed = 0
+        self.skipped = 0
+        self.incompressible = 0
+        self.removed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def __repr__(self):
+        saved = ""
+        if self.bytes_in:
+            saved = f" ({format_bytes(self.bytes_in)} -> {format_bytes(self.bytes_out)})"
+        return (
+            f"compressed {self.compressed} files{saved}, skipped {self.skipped} unchanged, "
+            f"{self.incompressible} not worth compressing, removed {self.removed}"
+        )
+
+
+def is_compressible(rel_path):
+    return rel_path.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def remove_sidecars(path, suffixes=SIDECAR_SUFFIXES):
+    removed = 0
+    for suffix in suffixes:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+            removed += 1
+    return removed
+
+
+# Writes a sidecar for every encoding that shrinks the file to at most
+# max_ratio of its size; files under min_size are left alone, since the
+# saving cannot make up for the extra request handling.
+class Compressor:
+    def __init__(self, min_size=1024, max_ratio=0.9, threads=8):
+        self.min_size = min_size
+        self.max_ratio = max_ratio
+        self.threads = threads
+
+    def compress_file(self, path, previous):
+        stat = os.stat(path)
+        record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if (
+            previous is not None
+            and previous["size"] == stat.st_size
+            and previous["mtime_ns"] == stat.st_mtime_ns
+            and all(os.path.exists(path + suffix) for suffix in previous["encodings"])
+        ):
+            return "skipped", previous, 0
+        with open(path, "rb") as f:
+            data = f.read()
+        record["hash"] = hashlib.sha256(data).hexdigest()
+        if previous is not None and previous.get("hash") == record["hash"]:
+            record["encodings"] = previous.get("encodings", [])
+            if all(os.path.exists(path + suffix) for suffix in record["encodings"]):
+                return "skipped", record, 0
+
+        record["encodings"] = []
+        smallest = len(data)
+        if len(data) >= self.min_size:
+            for suffix, compress in ENCODINGS:
+                compressed = compress(data)
+                if len(compressed) <= len(data) * self.max_ratio:
+                    write_if_changed(path + suffix, compressed)
+                    record["encodings"].append(suffix)
+                    smallest = min(smallest, len(compressed))
+        remove_sidecars(path, [suffix for suffix in SIDECAR_SUFFIXES if suffix not in record["encodings"]])
+        return ("compressed" if record["encodings"] else "incompressible"), record, smallest
+
+    # rel_paths are the outputs under root that should have sidecars now;
+    # previous is the mapping returned by the last run, so sidecars of files
+    # that are gone can be removed. Returns (stats, mapping for next run).
+    def run(self, root, rel_paths, previous=None):
+        previous = previous or {}
+        stats = CompressStats()
+        rel_paths = sorted(rel_path for rel_path in set(rel_paths) if is_compressible(rel_path))
+        records = {}
+
+        def compress(rel_path):
+            return self.compress_file(os.path.join(root, rel_path), previous.get(rel_path))
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for rel_path, (outcome, record, smallest) in zip(rel_paths, executor.map(compress, rel_paths)):
+                records[rel_path] = record
+                if outcome == "skipped":
+                    stats.skipped += 1
+                elif outcome == "incompressible":
+                    stats.incompressible += 1
+                else:
+                    stats.compressed += 1
+                    stats.bytes_in += record["size"]
+                    stats.bytes_out += smallest
+
+        for rel_path in previous:
+            if rel_path not in records:
+                path = os.path.normpath(os.path.join(root, rel_path))
+                stats.removed += remove_sidecars(path)
+                remove_empty_dirs(os.path.dirname(path), root)
+        return stats, records
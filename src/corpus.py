@@ -0,0 +1,103 @@
+import os
+import random
+
+WORDS = [
+    "hobbit", "shire", "ring", "wizard", "elf", "dwarf", "mountain", "river",
+    "forest", "journey", "council", "tower", "road", "song", "light", "shadow",
+]
+LANGUAGES = ["", "python", "javascript", "bash"]
+
+
+class CorpusOptions:
+    def __init__(
+        self,
+        pages=200,
+        blocks=30,
+        list_density=0.2,
+        code_density=0.1,
+        link_density=0.05,
+        nesting=2,
+        seed=0,
+    ):
+        self.pages = pages
+        self.blocks = blocks
+        self.list_density = list_density
+        self.code_density = code_density
+        self.link_density = link_density
+        self.nesting = nesting
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def inline_text(rng, words, link_density):
+    parts = []
+    for i in range(words):
+        roll = rng.random()
+        word = rng.choice(WORDS)
+        if roll < link_density:
+            parts.append(f"[{word}](/{rng.choice(WORDS)}/{rng.randrange(100)})")
+        elif roll < link_density * 1.5:
+            parts.append(f"![{word}](/images/{word}.png)")
+        elif roll < 0.06 + link_density:
+            parts.append(f"**{word}**")
+        elif roll < 0.10 + link_density:
+            parts.append(f"_{word}_")
+        elif roll < 0.12 + link_density:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def generate_block(rng, options):
+    roll = rng.random()
+    if roll < options.code_density:
+        language = rng.choice(LANGUAGES)
+        lines = [f"{rng.choice(WORDS)} = {rng.randrange(1000)}" for _ in range(rng.randint(2, 12))]
+        return "```" + language + "\n" + "\n".join(lines) + "\n```"
+    if roll < options.code_density + options.list_density:
+        items = rng.randint(3, 12)
+        if rng.random() < 0.5:
+            return "\n".join(f"- {inline_text(rng, 8, options.link_density)}" for _ in range(items))
+        return "\n".join(f"{n}. {inline_text(rng, 8, options.link_density)}" for n in range(1, items + 1))
+    if roll < options.code_density + options.list_density + 0.05:
+        return "> " + inline_text(rng, 30, options.link_density)
+    if roll < options.code_density + options.list_density + 0.12:
+        return "#" * rng.randint(2, 4) + " " + inline_text(rng, 5, 0)
+    lines = [inline_text(rng, 12, options.link_density) for _ in range(rng.randint(1, 5))]
+    return "\n".join(lines)
+
+
+def generate_page(rng, options, title):
+    blocks = [f"# {title}"]
+    for _ in range(options.blocks):
+        blocks.append(generate_block(rng, options))
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_dir(index, nesting):
+    parts = []
+    for level in range(nesting):
+        parts.append(f"section{(index >> (3 * level)) % 8}")
+    parts.append(f"page{index}")
+    return os.path.join(*parts)
+
+
+def generate_site(root, options):
+    rng = random.Random(options.seed)
+    content = os.path.join(root, "content")
+    for index in range(options.pages):
+        path = os.path.join(content, page_dir(index, options.nesting), "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(generate_page(rng, options, f"Page {index}"))
+    template = os.path.join(root, "template.html")
+    with open(template, "w") as f:
+        f.write(
+            '<!doctype html>\n<html>\n<head>\n<title>{{ Title }}</title>\n'
+            '<link href="/index.css" rel="stylesheet" />\n</head>\n'
+            "<body>\n<article>{{ Content }}</article>\n</body>\n</html>\n"
+        )
+    return content, template
@@ -0,0 +1,85 @@
+import os
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from htmlnode import escape_attribute, escape_text
+from metadata import metadata_index, page_url as source_url
+from page_writer import write_if_changed
+from search_index import page_url
+from sitemap import XML_DECLARATION, absolute_url
+
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+FEED_MAX_ENTRIES = 50
+
+
+# Atom wants full RFC 3339 timestamps; front matter dates may be bare days
+# or carry any offset. All are given in UTC, naive ones taken as UTC.
+def atom_timestamp(date):
+    parsed = datetime.fromisoformat(date)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def feed_path(dest_path):
+    if os.path.basename(dest_path) == "index.html":
+        return os.path.join(os.path.dirname(dest_path), "feed.xml")
+    return os.path.splitext(dest_path)[0] + ".xml"
+
+
+def render_feed(title, author, page_link, feed_link, entries):
+    updated = max((entry[2] for entry in entries), default="1970-01-01T00:00:00Z")
+    lines = [
+        XML_DECLARATION,
+        f'<feed xmlns="{ATOM_NAMESPACE}">\n',
+        f"<title>{escape_text(title)}</title>\n",
+        f'<link href="{escape_attribute(page_link)}"/>\n',
+        f'<link rel="self" href="{escape_attribute(feed_link)}"/>\n',
+        f"<id>{escape_text(page_link)}</id>\n",
+        f"<updated>{updated}</updated>\n",
+        f"<author><name>{escape_text(author)}</name></author>\n",
+    ]
+    for entry_title, link, entry_updated in entries:
+        lines.append(
+            f"<entry><title>{escape_text(entry_title)}</title><link href=\"{escape_attribute(link)}\"/>"
+            f"<id>{escape_text(link)}</id><updated>{entry_updated}</updated></entry>\n"
+        )
+    lines.append("</feed>\n")
+    return "".join(lines)
+
+
+# Every listing page gets an Atom feed of the pages it lists, next to it:
+# blog/index.html has blog/feed.xml. Entries come from the metadata index
+# and the manifest, so no page is read or rendered; undated pages use the
+# time their source last changed. RFC 4287 wants an author for the feed:
+# the listing page's author front matter, else site_author, else the host
+# the site is served from. Returns the rel paths written.
+def write_feeds(manifest, public_dir, basepath, site_url, dir_path_content, drafts=False, site_author=None):
+    modified = {}
+    for entry in manifest.pages.values():
+        modified[source_url(os.path.relpath(entry["source"], dir_path_content))] = entry.get("modified", "")
+
+    files = []
+    for dest_path in sorted(manifest.pages):
+        entry = manifest.pages[dest_path]
+        meta = metadata_index.get(entry["source"])
+        query = meta.get("list")
+        if "listing" not in entry or not query:
+            continue
+        items = metadata_index.listing(query, entry["source"], dir_path_content, drafts)[:FEED_MAX_ENTRIES]
+        entries = []
+        for url, title, date in items:
+            updated = atom_timestamp(date) if date else modified.get(url) or "1970-01-01T00:00:00Z"
+            entries.append((title, absolute_url(site_url, basepath + url[1:]), updated))
+        title = entry.get("title") or page_url(dest_path, public_dir, basepath)
+        path = feed_path(dest_path)
+        feed = render_feed(
+            title,
+            meta.get("author") or site_author or urlsplit(site_url).netloc,
+            absolute_url(site_url, page_url(dest_path, public_dir, basepath)),
+            absolute_url(site_url, page_url(path, public_dir, basepath)),
+            entries,
+        )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_if_changed(path, feed.encode("utf-8"))
+        files.append(os.path.relpath(path, public_dir).replace(os.sep, "/"))
+    return manifest.replace_generated("feeds", files, public_dir)
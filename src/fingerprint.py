@@ -0,0 +1,80 @@
+import json
+import os
+from manifest import hash_file
+from page_writer import write_if_changed
+
+FINGERPRINT_LENGTH = 12
+ASSET_MANIFEST = "asset-manifest.json"
+
+
+# images/tom.png with digest 3f2a... is published as images/tom.3f2a....png.
+def fingerprinted_path(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+# previous is the file's record from the last build: while its size and
+# mtime are unchanged, the hash recorded then is reused instead of reading
+# the file again.
+def file_fingerprint(src_path, record, previous=None):
+    if (
+        previous is not None
+        and "hash" in previous
+        and previous["size"] == record["size"]
+        and previous["mtime_ns"] == record["mtime_ns"]
+    ):
+        return previous["hash"]
+    return hash_file(src_path)[:FINGERPRINT_LENGTH]
+
+
+# Maps the root-relative url of every static file to the url of its
+# fingerprinted copy; query strings and fragments are kept. Rewriters are
+# cached per table, so a table is never changed once built and instances
+# compare by identity.
+class AssetUrls:
+    def __init__(self, assets):
+        self.urls = {}
+        for rel_path, record in assets.items():
+            if "output" in record:
+                self.urls["/" + rel_path.replace(os.sep, "/")] = "/" + record["output"].replace(os.sep, "/")
+
+    def get(self, url):
+        end = len(url)
+        for char in "?#":
+            index = url.find(char)
+            if index != -1:
+                end = min(end, index)
+        fingerprinted = self.urls.get(url[:end])
+        if fingerprinted is None:
+            return url
+        return fingerprinted + url[end:]
+
+
+# The table of the current build, None when fingerprinting is off. It is
+# set after the static files are synced and before any page is rendered,
+# so worker processes are handed it (see generate_page.worker_state).
+class Fingerprints:
+    def __init__(self):
+        self.urls = None
+
+    def update(self, assets, enabled):
+        self.urls = AssetUrls(assets) if enabled else None
+
+
+fingerprints = Fingerprints()
+
+
+# asset-manifest.json maps every static file's original rel path to the
+# fingerprinted one, for deploy tooling and anything outside the pages that
+# needs to find an asset. Returns the rel paths written.
+def write_asset_manifest(manifest, public_dir, enabled):
+    if not enabled:
+        return manifest.replace_generated("assets", [], public_dir)
+    outputs = {
+        rel_path.replace(os.sep, "/"): record["output"].replace(os.sep, "/")
+        for rel_path, record in manifest.assets.items()
+        if "output" in record
+    }
+    text = json.dumps(outputs, indent=1, sort_keys=True)
+    write_if_changed(os.path.join(public_dir, ASSET_MANIFEST), text.encode("utf-8"))
+    return manifest.replace_generated("assets", [ASSET_MANIFEST], public_dir)
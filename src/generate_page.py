@@ -1,72 +1,303 @@
+import json
 import os 
-from block import markdown_to_html_node
+from concurrent.futures import ProcessPoolExecutor
+from block import MarkdownStream, block_cache, highlight_cache, render_blocks
+from fingerprint import fingerprints
+from highlight import HIGHLIGHTER_VERSION
+from htmlnode import ParentNode, escape_text
+from image_size import image_sizes
+from link_index import linked_assets, page_links
+from manifest import hash_file, hash_text
+from metadata import (
+    extract_title, find_title, listing_to_html_node, metadata_index, read_front_matter, skip_front_matter,
+    split_front_matter,
+)
+from search_index import page_terms, search_entry, top_terms
+from page_writer import PageWriter, replace_if_changed, write_if_changed
+from template import TemplateCache, basepath_rewriter, join_url_slots, select_template, slot_rewriter, split_url_slots
 from pathlib import Path
 
+# Bump whenever a change to the renderer alters the generated HTML, the
+# manifest's page entries or the pickled node layout, so that incremental
+# builds fall back to a full rebuild and the block cache is discarded.
+RENDERER_VERSION = 13
 
+# Pages and cached blocks embed highlighted code, so the manifests and the
+# block cache are versioned by both.
+OUTPUT_VERSION = f"{RENDERER_VERSION}.{HIGHLIGHTER_VERSION}"
 
-def extract_title(markdown): 
-    split_markdown = markdown.split("\n")
-    for line in split_markdown: 
-        if line.startswith("# "): 
-            heading = line.strip("# ")
-            heading = heading.strip()
-            return heading 
+# Sources larger than this are rendered block by block straight into the
+# output file instead of being read, parsed and serialized whole.
+STREAM_THRESHOLD = 8 * 1024 * 1024
 
-def generate_page(from_path, template_path, dest_path):
+# Threads writing finished pages behind the renderer; 0 writes inline.
+WRITE_THREADS = 4
+
+template_cache = TemplateCache()
+# Set in worker processes, whose render cache usage goes back to the parent.
+report_cache_usage = False
+
+
+def generate_page(from_path, template_path, dest_path, basepath="/"):
     print(f"Generating page {from_path} to {dest_path} using {template_path}")
+    stream_page(from_path, dest_path, template_cache.load(template_path), basepath)
+
+
+# The front matter and title are found in a first pass over the file, then
+# the file is rewound and rendered into the output as it is read. Like every
+# page, it is written to a temporary file first and renamed over the old
+# output when complete, unless the two are identical. Links go to links as
+# they are found (see MarkdownStream). Returns the links and the page's
+# search entry.
+def stream_page(from_path, dest_path, template, basepath, listing=None, links=None):
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    try:
+        with open(from_path) as source, open(tmp_path, "w") as f:
+            meta, count = read_front_matter(source)
+            source.seek(0)
+            heading = meta.get("title") or find_title(skip_front_matter(source, count))
+            source.seek(0)
+            content = MarkdownStream(skip_front_matter(source, count), links)
+            slots = page_slots(meta, heading, content, listing)
+            template.stream(f.write, slots, basepath_rewriter(basepath, fingerprints.urls))
+        replace_if_changed(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return content.links, search_entry(heading, top_terms(content.terms))
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for content in os.listdir(dir_path_content):
+        content_path = os.path.join(dir_path_content, content)
+        if os.path.isfile(content_path):
+            pages.append((content_path, page_dest_path(content, dest_dir_path)))
+        else:
+            sub_dest_dir_path = os.path.join(dest_dir_path, content)
+            pages.extend(collect_pages(content_path, sub_dest_dir_path))
+    return pages
+
+
+def page_dest_path(rel_path, dest_dir_path):
+    return os.path.join(dest_dir_path, Path(rel_path).with_suffix(".html"))
+
+
+# Template slots of a page: Title and Content, the front matter Date, and
+# Listing, the pages a listing page lists (empty on other pages).
+def page_slots(meta, heading, content, listing=None):
+    return {
+        "Title": escape_text(heading or ""),
+        "Content": content,
+        "Date": escape_text(meta.get("date", "")),
+        "Listing": listing if listing is not None else "",
+    }
+
+
+# A basepath of None renders root-relative urls as slots (see url_slot).
+def render_page(md_string, template, basepath, links=None, search=None, listing=None):
+    if basepath is None:
+        rewrite_url = slot_rewriter(fingerprints.urls)
+    else:
+        rewrite_url = basepath_rewriter(basepath, fingerprints.urls)
+    meta, md_string = split_front_matter(md_string)
+    blocks = render_blocks(md_string)
+    html_string = ParentNode("div", [node for node, _, _ in blocks])
+    if links is not None:
+        links.extend(page_links(md_string, [urls for _, _, urls in blocks]))
+    heading = meta.get("title") or extract_title(md_string)
+    if search is not None:
+        search.update(search_entry(heading, page_terms(terms for _, terms, _ in blocks)))
+    html_string = html_string.to_html(rewrite_url)
+    if listing is not None:
+        listing = listing.to_html(rewrite_url)
+
+    return template.render(page_slots(meta, heading, html_string, listing), rewrite_url)
+
+
+def render_job(job):
+    from_path, md_string, template, basepath, listing = job
+    links = []
+    search = {}
+    try:
+        html = render_page(md_string, template, basepath, links, search, listing)
+    except Exception as e:
+        raise ValueError(f"failed to render {from_path}: {e}") from e
+    usage = None
+    if report_cache_usage:
+        usage = (block_cache.take_usage(), highlight_cache.take_usage())
+    return html, links, search, usage
+
+
+# What rendering reads from module state besides the job, handed to worker
+# processes explicitly: under the spawn and forkserver start methods they
+# inherit nothing from this process.
+def worker_state():
+    return {
+        "asset_urls": fingerprints.urls,
+        "image_sizes": image_sizes.entries,
+        "block_cache": (block_cache.path, block_cache.version),
+        "highlight_cache": (highlight_cache.path, highlight_cache.version),
+    }
+
+
+def init_worker(state):
+    global report_cache_usage
+    report_cache_usage = True
+    fingerprints.urls = state["asset_urls"]
+    image_sizes.entries = state["image_sizes"]
+    block_cache.start_worker(*state["block_cache"])
+    highlight_cache.start_worker(*state["highlight_cache"])
+
+
+def render_jobs(jobs, n_jobs):
+    if n_jobs <= 1 or len(jobs) <= 1:
+        yield from map(render_job, jobs)
+        return
+    chunksize = max(1, len(jobs) // (n_jobs * 4))
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker, initargs=(worker_state(),)) as executor:
+        yield from executor.map(render_job, jobs, chunksize=chunksize)
+
+
+def read_source(from_path):
     with open(from_path) as f:
-        md_string = f.read()
+        return f.read()
 
-    with open(template_path) as f:
-        template_string = f.read()
 
-    html_content = markdown_to_html_node(md_string)
-    html_content = html_content.to_html()
+def write_page(dest_path, html):
+    return write_if_changed(dest_path, html.encode("utf-8"))
 
-    heading = extract_title(md_string)
 
-    html = template_string.replace("{{ Title }}", heading)
-    html = html.replace("{{ Content }}", html_content)
+# Another output tree built from the same renders: its own basepath, public
+# directory and manifest.
+class Target:
+    def __init__(self, basepath, public_dir, manifest=None):
+        self.basepath = basepath
+        self.public_dir = public_dir
+        self.manifest = manifest
 
-    path_of_dest = os.path.dirname(dest_path)
-    os.makedirs(path_of_dest, exist_ok=True)
-    
-    with open(dest_path, "w") as f:
-        f.write(html)
 
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1, templates=None, targets=(),
+    drafts=False,
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    metadata_index.update([from_path for from_path, _ in pages], prune=True)
+    generate_pages(pages, dir_path_content, template_path, basepath, manifest, jobs, templates, targets, drafts)
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    content_dir = os.listdir(dir_path_content)
 
-    for content in content_dir: 
-        content_path = os.path.join(dir_path_content, content)
-        if os.path.isfile(content_path):
-            with open(content_path) as f:
-                md_string = f.read()
-            html_string = markdown_to_html_node(md_string)
-            html_string = html_string.to_html()
-            with open(template_path) as f:
-                template_string = f.read()
+# Every page has one output per target, (dest_path, basepath, manifest),
+# each checked against its own manifest; a page is rendered once if any of
+# them is stale and written only to those. A page needed under several
+# basepaths is rendered with url slots and joined once per basepath;
+# streamed pages are too large to hold, so they are rendered per output.
+# Drafts, templates and listings come from the metadata index, so drafts
+# are skipped without being read.
+def generate_pages(
+    pages, dir_path_content, template_path, basepath, manifest=None, jobs=1, templates=None, targets=(), drafts=False,
+):
+    metadata_index.update(from_path for from_path, _ in pages)
+    pending = []
+    streamed = []
+    for from_path, dest_path in pages:
+        meta = metadata_index.get(from_path)
+        if meta.get("draft") and not drafts:
+            continue
+        if os.path.getsize(from_path) > STREAM_THRESHOLD:
+            md_string = None
+            source_hash = hash_file(from_path)
+        else:
+            md_string = read_source(from_path)
+            source_hash = hash_text(md_string)
+        page_template_path = meta.get("template")
+        if not page_template_path:
+            page_template_path = select_template(from_path, dir_path_content, template_path, templates)
+        elif not os.path.isfile(page_template_path):
+            raise ValueError(f"{os.path.normpath(from_path)}: template {page_template_path} does not exist")
+        template = template_cache.load(page_template_path)
+        listing = listing_hash = None
+        if meta.get("list"):
+            items = metadata_index.listing(meta["list"], from_path, dir_path_content, drafts)
+            listing = listing_to_html_node(items)
+            listing_hash = hash_text(json.dumps(items))
+        page = (from_path, source_hash, page_template_path, template, page_template_hash(template), listing_hash)
+        outputs = [(dest_path, basepath, manifest)]
+        if targets:
+            rel_path = os.path.relpath(from_path, dir_path_content)
+            outputs += [(page_dest_path(rel_path, t.public_dir), t.basepath, t.manifest) for t in targets]
+        stale = [output for output in outputs if is_stale(output, page)]
+        if not stale:
+            continue
+        if md_string is None:
+            streamed.append((page, stale, listing))
+        else:
+            pending.append((md_string, page, stale, listing))
+
+    for page, stale, listing in streamed:
+        from_path, _, _, template, _, _ = page
+        for output in stale:
+            dest_path, basepath, manifest = output
+            # Links go straight to the manifest's side file, not into memory.
+            links = manifest.link_writer(dest_path) if manifest is not None else None
+            try:
+                _, search = stream_page(from_path, dest_path, template, basepath, listing, links)
+            except Exception as e:
+                if links is not None:
+                    links.discard()
+                raise ValueError(f"failed to render {from_path}: {e}") from e
+            if links is not None:
+                links.close()
+            record_page(output, page, dir_path_content, None, search)
+
+    render_args = [
+        (page[0], md_string, page[3], render_basepath(stale), listing) for md_string, page, stale, listing in pending
+    ]
+    with PageWriter(write_page, WRITE_THREADS) as writer:
+        for (_, page, stale, _), args, result in zip(pending, render_args, render_jobs(render_args, jobs)):
+            html, links, search, usage = result
+            if usage is not None:
+                block_cache.merge_usage(usage[0])
+                highlight_cache.merge_usage(usage[1])
+            parts = split_url_slots(html) if args[3] is None else None
+            for output in stale:
+                writer.submit(output[0], html if parts is None else join_url_slots(parts, output[1]))
+                record_page(output, page, dir_path_content, links, search)
+
 
-            heading = extract_title(md_string)
-            html = template_string.replace("{{ Title }}", heading)
-            html = html.replace("{{ Content }}", html_string)
-            html = html.replace('href="/', f'href="{basepath}')
-            html = html.replace('src="/', f'src="{basepath}')
+# With fingerprinting, a page's output also depends on the fingerprints of
+# the static files its template links to, so they are part of its hash.
+def page_template_hash(template):
+    if fingerprints.urls is None:
+        return template.hash
+    return hash_text(template.hash + "\n".join(fingerprints.urls.get(url) for url in template.urls))
 
-            current_path = Path(content)
-            new_path = current_path.with_suffix(".html")
 
-            new_dest_dir_path = os.path.join(dest_dir_path, new_path)
+def render_basepath(outputs):
+    basepaths = {basepath for _, basepath, _ in outputs}
+    return basepaths.pop() if len(basepaths) == 1 else None
 
-            os.makedirs(os.path.dirname(new_dest_dir_path), exist_ok=True)
 
-            with open(new_dest_dir_path, "w") as f:
-                f.write(html)
+def is_stale(output, page):
+    dest_path, basepath, manifest = output
+    if manifest is None:
+        return True
+    _, source_hash, template_path, _, template_hash, listing_hash = page
+    if manifest.stale_reason(dest_path, source_hash, template_path, template_hash, basepath, listing_hash):
+        return True
+    manifest.skip()
+    return False
 
 
-        if os.path.isfile(content_path) == False:
-            sub_dir_path_content = os.path.join(dir_path_content, content)
-            new_dest_dir_path = os.path.join(dest_dir_path, content)
-            generate_pages_recursive(sub_dir_path_content, template_path, new_dest_dir_path, basepath)
-        
\ No newline at end of file
+def record_page(output, page, dir_path_content, links, search=None):
+    dest_path, basepath, manifest = output
+    if manifest is None:
+        return
+    from_path, source_hash, template_path, _, template_hash, listing_hash = page
+    rel_path = page_dest_path(os.path.relpath(from_path, dir_path_content), "").replace(os.sep, "/")
+    # links=None: they were streamed to the side file already.
+    recorded_links = manifest.page_links(dest_path) if links is None else links
+    assets = linked_assets(recorded_links, rel_path, basepath, manifest.assets)
+    manifest.record(
+        dest_path, from_path, source_hash, template_path, template_hash, basepath, links, assets, search, listing_hash,
+    )
@@ -0,0 +1,94 @@
+import re
+from htmlnode import escape_text
+
+# Each language is one regex of named alternatives tried left to right; the
+# group that matched names the token class, emitted as <span class="tok-NAME">.
+# Text between matches is plain code. Patterns only need to be good enough
+# to colour documentation snippets, not to parse the language.
+
+PYTHON = re.compile(
+    r"""
+    (?P<comment>\#[^\n]*)
+    | (?P<string>[rRbBuUfF]{0,2}(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'))
+    | (?P<decorator>@[\w.]+)
+    | (?P<keyword>\b(?:False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else
+        |except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try
+        |while|with|yield|match|case)\b)
+    | (?P<builtin>\b(?:print|len|range|enumerate|zip|map|filter|open|int|str|float|bool|list|dict|set
+        |tuple|type|isinstance|super|self|cls|sorted|min|max|sum|any|all|repr)\b)
+    | (?P<number>\b(?:0[xX][0-9a-fA-F_]+|0[oO][0-7_]+|0[bB][01_]+|\d[\d_]*\.?\d*(?:[eE][+-]?\d+)?j?)\b)
+    """,
+    re.VERBOSE,
+)
+
+JAVASCRIPT = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*[\s\S]*?\*/)
+    | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+    | (?P<keyword>\b(?:async|await|break|case|catch|class|const|continue|debugger|default|delete|do
+        |else|export|extends|finally|for|function|if|import|from|in|instanceof|let|new|of|return
+        |static|super|switch|this|throw|try|typeof|var|void|while|with|yield|true|false|null
+        |undefined)\b)
+    | (?P<builtin>\b(?:console|document|window|Array|Object|String|Number|Boolean|Promise|Map|Set
+        |JSON|Math|Date|Error|require|module|exports)\b)
+    | (?P<number>\b(?:0[xX][0-9a-fA-F]+|\d+\.?\d*(?:[eE][+-]?\d+)?)\b)
+    """,
+    re.VERBOSE,
+)
+
+BASH = re.compile(
+    r"""
+    (?P<comment>(?<![\w$\#])\#[^\n]*)
+    | (?P<string>"(?:\\.|[^"\\])*"|'[^']*')
+    | (?P<variable>\$(?:\{[^}\n]*\}|\w+|[@*\#?$!0-9-]))
+    | (?P<keyword>\b(?:if|then|else|elif|fi|for|while|until|do|done|case|esac|in|function|return
+        |local|export|readonly|set|unset|shift|exit|source)\b)
+    | (?P<builtin>\b(?:echo|cd|ls|cat|grep|sed|awk|mkdir|rm|cp|mv|chmod|pip|python3?|git|curl|make
+        |test|printf|read|sudo)\b)
+    """,
+    re.VERBOSE,
+)
+
+JSON = re.compile(
+    r"""
+    (?P<property>"(?:\\.|[^"\\\n])*"(?=\s*:))
+    | (?P<string>"(?:\\.|[^"\\\n])*")
+    | (?P<keyword>\b(?:true|false|null)\b)
+    | (?P<number>-?\b\d+\.?\d*(?:[eE][+-]?\d+)?\b)
+    """,
+    re.VERBOSE,
+)
+
+# Bump when the patterns or the markup change. It versions the cache of
+# highlighted snippets and, through generate_page.OUTPUT_VERSION, the block
+# cache and the manifests, so every page with highlighted code is rebuilt.
+HIGHLIGHTER_VERSION = 1
+
+LANGUAGES = {
+    "python": PYTHON,
+    "py": PYTHON,
+    "javascript": JAVASCRIPT,
+    "js": JAVASCRIPT,
+    "bash": BASH,
+    "sh": BASH,
+    "shell": BASH,
+    "json": JSON,
+}
+
+
+def highlight(code, language):
+    pattern = LANGUAGES.get(language.lower())
+    if pattern is None:
+        return None
+    parts = []
+    pos = 0
+    for match in pattern.finditer(code):
+        start, end = match.span()
+        if start == end:
+            continue
+        if start > pos:
+            parts.append(escape_text(code[pos:start]))
+        parts.append(f'<span class="tok-{match.lastgroup}">{escape_text(match.group())}</span>')
+        pos = end
+    parts.append(escape_text(code[pos:]))
+    return "".join(parts)
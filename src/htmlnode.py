@@ -1,53 +1,147 @@
+from functools import lru_cache
+
+URL_ATTRIBUTES = ("href", "src")
+VOID_TAGS = ("img", "br", "hr")
+
+
+# Most text has nothing to escape, so the substring checks come first and
+# the common case returns the string itself without copying it.
+def escape_text(text):
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value):
+    value = escape_text(value)
+    if '"' in value:
+        return value.replace('"', "&quot;")
+    return value
+
+
+# The same href and src values repeat on every page (navigation, images),
+# so each rewritten and escaped ' key="value"' fragment is built once.
+@lru_cache(maxsize=8192)
+def attribute_html(key, value, rewrite_url=None):
+    if rewrite_url is not None and key in URL_ATTRIBUTES:
+        value = rewrite_url(value)
+    return f' {key}="{escape_attribute(str(value))}"'
+
+
+# Pages allocate one node per inline span, so the classes use __slots__
+# instead of a per-instance __dict__.
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value 
         self.children = children 
         self.props = props 
 
-    def to_html(self): 
+    def to_html(self, rewrite_url=None): 
+        parts = []
+        self.emit_html(parts.append, rewrite_url)
+        return "".join(parts)
+
+    def write_html(self, fp, rewrite_url=None):
+        self.emit_html(fp.write, rewrite_url)
+
+    def emit_html(self, write, rewrite_url=None):
         raise NotImplementedError("not implemented")
     
-    def props_to_html(self): 
+    def props_to_html(self, rewrite_url=None): 
         if self.props is None:
             return ""
         html_string = ""
-        for key in self.props: 
-            html_string += " " + f'{key}="{self.props[key]}"'
+        for key, value in self.props.items():
+            html_string += attribute_html(key, value, rewrite_url)
         return html_string 
 
     def __repr__(self):
         return f"HTMLNode {self.tag}, {self.value}, {self.children}, {self.props}"
 
 class LeafNode(HTMLNode): 
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     
-    def to_html(self):
-        if self.tag in ("img", "br", "hr"):
-            return f"<{self.tag}{self.props_to_html()}>"
-        if self.value is None:
+    def to_html(self, rewrite_url=None):
+        if self.tag in VOID_TAGS:
+            return f"<{self.tag}{self.props_to_html(rewrite_url)}>"
+        value = self.value
+        if value is None:
             raise ValueError("All LeafNode's must have a value")
-        elif self.tag is None:
-            return self.value 
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        # escape_text's checks, inlined: this runs once per text span.
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
+        if self.tag is None:
+            return value
+        return f"<{self.tag}{self.props_to_html(rewrite_url)}>{value}</{self.tag}>"
+
+    def emit_html(self, write, rewrite_url=None):
+        write(self.to_html(rewrite_url))
+
+    # Pickled as constructor arguments: the default for slotted classes
+    # stores every slot name with every node.
+    def __reduce__(self):
+        return LeafNode, (self.tag, self.value, self.props)
 
     def __repr__(self):
         return f"HTMLNode {self.tag}, {self.value}, {self.props}"
 
+# Markup produced elsewhere (e.g. highlighted code), emitted exactly as given
+# and never escaped again.
+class RawNode(LeafNode):
+    __slots__ = ()
+
+    def __init__(self, html):
+        super().__init__(None, html)
+
+    def to_html(self, rewrite_url=None):
+        return self.value
+
+    def __reduce__(self):
+        return RawNode, (self.value,)
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def __reduce__(self):
+        return ParentNode, (self.tag, self.children, self.props)
+
+    def open_tag(self, rewrite_url=None):
         if self.tag is None:
             raise ValueError("Must have HTML tag")
         elif self.children is None:
             raise ValueError("Must have children")
-        html_string = ""
-        for child in self.children: 
-            # child.to_html() 
-            html_string += child.to_html()
-        return f'<{self.tag}>{html_string}</{self.tag}>'
+        return f"<{self.tag}{self.props_to_html(rewrite_url)}>"
 
+    # Walks the tree with an explicit stack instead of recursing, so deeply
+    # nested documents cannot hit the recursion limit, and hands every
+    # fragment to write() instead of concatenating strings per level.
+    def emit_html(self, write, rewrite_url=None):
+        parent_type = ParentNode
+        write(self.open_tag(rewrite_url))
+        stack = []
+        node = self
+        children = iter(self.children)
+        while True:
+            for child in children:
+                if isinstance(child, parent_type):
+                    write(child.open_tag(rewrite_url))
+                    stack.append((node, children))
+                    node = child
+                    children = iter(child.children)
+                    break
+                write(child.to_html(rewrite_url))
+            else:
+                write(f"</{node.tag}>")
+                if not stack:
+                    return
+                node, children = stack.pop()
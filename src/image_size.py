@@ -0,0 +1,113 @@
+import os
+import struct
+from json_cache import JsonCache
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers, which carry the dimensions; C4, C8 and CC
+# share the range but are other segments.
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers that stand alone, without a length and payload.
+JPEG_BARE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+# Bump when the stored entries change shape, to sniff every image again.
+IMAGE_SIZES_VERSION = 1
+
+
+def jpeg_size(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in JPEG_BARE_MARKERS:
+            continue
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8X" and len(head) >= 30:
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+# Reads the dimensions from the file header: the first 32 bytes hold them
+# for PNG, GIF and WebP; JPEG is walked segment by segment, seeking over
+# the payloads (EXIF thumbnails and the like), up to the frame header.
+# Nothing is decoded. Returns (width, height), or None for anything else.
+def read_image_size(path):
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR" and len(head) >= 24:
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            return jpeg_size(f)
+    return None
+
+
+# Dimensions of the images among the static files, kept in
+# .cache/images.json. Entries are keyed by the static file's rel path and
+# reuse the size and mtime the static sync already recorded, so an image is
+# only read again when it changed.
+class ImageSizeCache(JsonCache):
+    version = IMAGE_SIZES_VERSION
+    key = "images"
+
+    def __init__(self):
+        super().__init__()
+        self.sniffed = 0
+
+    # assets maps every static file's rel path to its {"size", "mtime_ns"}
+    # record; entries of files no longer among them are dropped.
+    def update(self, static_dir, assets):
+        entries = {}
+        for rel_path, record in assets.items():
+            if not rel_path.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            entry = self.entries.get(rel_path)
+            if entry is None or entry["size"] != record["size"] or entry["mtime_ns"] != record["mtime_ns"]:
+                try:
+                    size = read_image_size(os.path.join(static_dir, rel_path))
+                except OSError:
+                    size = None
+                entry = {"size": record["size"], "mtime_ns": record["mtime_ns"], "dimensions": size}
+                self.sniffed += 1
+            entries[rel_path] = entry
+        self.entries = entries
+
+    # Only root-relative srcs name a static file independently of the page.
+    def get(self, src):
+        if not src.startswith("/") or src.startswith("//"):
+            return None
+        entry = self.entries.get(src[1:].split("?", 1)[0].split("#", 1)[0].replace("/", os.sep))
+        return entry["dimensions"] if entry is not None else None
+
+    def __repr__(self):
+        return f"{len(self.entries)} images, {self.sniffed} sniffed"
+
+
+image_sizes = ImageSizeCache()
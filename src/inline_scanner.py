@@ -0,0 +1,77 @@
+from textnode import TextType
+from markdown_extract import IMAGE_PATTERN, LINK_PATTERN
+
+# Single left-to-right scan producing the same (text_type, text, url) stream
+# as running split_nodes_delimiter for "`", "**" and "_", then
+# split_nodes_image and split_nodes_link. A delimiter only closes inside the
+# span the earlier passes would have left as TEXT, i.e. bold cannot cross a
+# code span and italic cannot cross either. The next position of each
+# delimiter is cached and only searched for again once the scan passes it,
+# so the whole text is walked a constant number of times.
+
+def scan_inline(text):
+    tokens = []
+    length = len(text)
+    tick = star = under = -1
+    pos = 0
+    while pos < length:
+        if tick < pos:
+            tick = text.find("`", pos)
+            if tick == -1:
+                tick = length
+        if star < pos:
+            star = text.find("**", pos)
+            if star == -1:
+                star = length
+        if under < pos:
+            under = text.find("_", pos)
+            if under == -1:
+                under = length
+        end = min(tick, star, under)
+        if end > pos:
+            scan_plain(text, pos, end, tokens)
+            pos = end
+        elif end == tick:
+            close = text.find("`", pos + 1)
+            if close == -1:
+                raise ValueError("invalid markdown, formatted section not closed")
+            if close > pos + 1:
+                tokens.append((TextType.CODE, text[pos + 1 : close], None))
+            pos = close + 1
+        elif end == star:
+            close = text.find("**", pos + 2)
+            if close == -1 or close > tick:
+                raise ValueError("invalid markdown, formatted section not closed")
+            if close > pos + 2:
+                tokens.append((TextType.BOLD, text[pos + 2 : close], None))
+            pos = close + 2
+        else:
+            close = text.find("_", pos + 1)
+            if close == -1 or close > tick or close > star:
+                raise ValueError("invalid markdown, formatted section not closed")
+            if close > pos + 1:
+                tokens.append((TextType.ITALIC, text[pos + 1 : close], None))
+            pos = close + 1
+    return tokens
+
+
+def scan_plain(text, start, end, tokens):
+    if text.find("[", start, end) == -1:
+        tokens.append((TextType.TEXT, text[start:end], None))
+        return
+    if text.find("![", start, end) != -1:
+        for match in IMAGE_PATTERN.finditer(text, start, end):
+            scan_links(text, start, match.start(), tokens)
+            tokens.append((TextType.IMAGE, match.group(1), match.group(2)))
+            start = match.end()
+    scan_links(text, start, end, tokens)
+
+
+def scan_links(text, start, end, tokens):
+    for match in LINK_PATTERN.finditer(text, start, end):
+        if match.start() > start:
+            tokens.append((TextType.TEXT, text[start : match.start()], None))
+        tokens.append((TextType.LINK, match.group(1), match.group(2)))
+        start = match.end()
+    if end > start:
+        tokens.append((TextType.TEXT, text[start:end], None))
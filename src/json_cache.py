@@ -0,0 +1,37 @@
+import json
+import os
+from page_writer import write_if_changed
+
+
+# Entries kept between builds in one JSON file, as {"version": version,
+# key: entries}. A missing or unreadable file, or one written for another
+# version, loads as empty, so bumping version discards everything stored.
+class JsonCache:
+    version = 1
+    key = "entries"
+
+    def __init__(self):
+        self.path = None
+        self.entries = {}
+
+    def load(self, path):
+        self.path = path
+        self.entries = {}
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == self.version:
+            self.entries = data.get(self.key, {})
+
+    # Written through write_if_changed, so an interrupted build leaves the
+    # previous file intact and an unchanged one keeps its mtime.
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        text = json.dumps({"version": self.version, self.key: self.entries}, sort_keys=True)
+        write_if_changed(self.path, text.encode("utf-8"))
@@ -0,0 +1,108 @@
+import os
+import posixpath
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+from splitblocks import iter_numbered_blocks
+from template import basepath_rewriter
+
+
+# The urls of a block are those of its inline tokens, collected while the
+# block is rendered (see render_block), so nothing is parsed or walked twice;
+# the source line is found by locating the url in the block.
+def block_links(first_line, block, urls):
+    links = []
+    for url in urls:
+        offset = block.find(url)
+        line = first_line + block.count("\n", 0, offset) if offset != -1 else first_line
+        links.append([url, line])
+    return links
+
+
+def page_links(markdown, block_urls):
+    links = []
+    for (first_line, block), urls in zip(iter_numbered_blocks(markdown.split("\n")), block_urls):
+        links.extend(block_links(first_line, block, urls))
+    return links
+
+
+def output_files(manifest, public_dir):
+    files = {rel_path.replace(os.sep, "/") for rel_path in manifest.assets}
+    for dest_path in manifest.pages:
+        files.add(os.path.relpath(dest_path, public_dir).replace(os.sep, "/"))
+    return files
+
+
+# The unquoted path of an internal url, None for an external one or a bare
+# fragment. Absolute urls are rewritten for the basepath exactly as in the
+# generated page. Only the url and the basepath matter, and pages repeat the
+# same links, so each pair is split and unquoted once.
+@lru_cache(maxsize=65536)
+def link_path(url, basepath):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or parts.path == "":
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        rewrite_url = basepath_rewriter(basepath)
+        if rewrite_url is not None:
+            path = unquote(urlsplit(rewrite_url(url)).path)
+    return path
+
+
+# Resolves a link path as the browser would: absolute paths must fall under
+# the basepath, relative ones are taken from the page's own directory.
+def resolve_target(path, page, basepath):
+    if path.startswith("/"):
+        if not path.startswith(basepath):
+            return None
+        path = path[len(basepath):]
+    else:
+        path = posixpath.join(posixpath.dirname(page), path)
+    trailing = path.endswith("/") or path == ""
+    path = posixpath.normpath(path)
+    if path.startswith(".."):
+        return None
+    if path == ".":
+        path = ""
+    return path, trailing
+
+
+def target_exists(target, files):
+    if target is None:
+        return False
+    path, trailing = target
+    index = posixpath.join(path, "index.html")
+    if trailing:
+        return index in files
+    return path in files or index in files or path + ".html" in files
+
+
+# The static files a page links to, as keys of the manifest's assets. The
+# page is recorded as depending on them.
+def linked_assets(links, page, basepath, assets):
+    used = []
+    for url, _ in links:
+        path = link_path(url, basepath)
+        if path is None:
+            continue
+        target = resolve_target(path, page, basepath)
+        if target is None:
+            continue
+        rel_path = target[0].replace("/", os.sep)
+        if rel_path in assets and rel_path not in used:
+            used.append(rel_path)
+    return used
+
+
+def check_links(manifest, public_dir, basepath):
+    files = output_files(manifest, public_dir)
+    broken = []
+    for dest_path, entry in sorted(manifest.pages.items()):
+        page = os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+        for url, line in manifest.page_links(dest_path):
+            path = link_path(url, basepath)
+            if path is None:
+                continue
+            if not target_exists(resolve_target(path, page, basepath), files):
+                broken.append((entry["source"], line, url))
+    return broken
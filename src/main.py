@@ -1,52 +1,474 @@
 from textnode import TextNode
-from generate_page import generate_page, generate_pages_recursive
+from block import block_cache, highlight_cache
+from compress import Compressor
+from feeds import write_feeds
+from fingerprint import fingerprints, write_asset_manifest
+from generate_page import Target, generate_page, generate_pages, generate_pages_recursive, page_dest_path, OUTPUT_VERSION
+from highlight import HIGHLIGHTER_VERSION
+from image_size import image_sizes
+from link_index import check_links
+from manifest import BuildManifest, hash_text
+from metadata import metadata_index
+from profiler import Profiler
+from search_index import write_search_index
+from sitemap import write_sitemap
+from serve import start_server, watch
+from static_sync import LINK_MODES, remove_synced_file, sync_file, sync_static, synced_output
+import argparse
 import os 
-import shutil
+import re
 import sys 
-
-def static_to_public(public_path, private_path, is_root=True):        
-    if is_root:
-        if os.path.exists(public_path):
-            shutil.rmtree(public_path)
-        os.mkdir(public_path)
-    for file in os.listdir(private_path): 
-        file_path = os.path.join(private_path, file)
-        if os.path.isfile(file_path) == True: 
-            shutil.copy(file_path, public_path)
-        else: 
-            subdirectory = os.path.join(public_path, file)
-            if os.path.exists(subdirectory) == False:
-                os.mkdir(subdirectory)
-            static_to_public(subdirectory, file_path, is_root=False)
-
+import threading
+import time
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.build_manifest.json"
+cache_dir = "./.cache"
 default_basepath = "/"
+commands = ("build", "serve", "check-links")
 
-def main():
-    basepath = default_basepath
-    if len(sys.argv) >= 2:
-        basepath = sys.argv[1]
+def parse_args(argv):
+    command = "build"
+    if len(argv) > 0 and argv[0] in commands:
+        command = argv[0]
+        argv = argv[1:]
+    parser = argparse.ArgumentParser(
+        prog="main.py [build|serve|check-links]",
+        description=(
+            "Build the site from ./content into ./docs, serve ./docs while rebuilding on change, "
+            "or build and report broken internal links."
+        ),
+    )
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="render pages across N worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--template-for", action="append", default=[], metavar="DIR=TEMPLATE",
+        help="render pages under content/DIR with TEMPLATE instead of template.html",
+    )
+    parser.add_argument(
+        "--target", action="append", default=[], metavar="BASEPATH=DIR",
+        help="build: also write the site for BASEPATH into DIR, from the same renders",
+    )
+    parser.add_argument(
+        "--checksum", action="store_true",
+        help="compare static files by content when size matches but mtime differs",
+    )
+    parser.add_argument(
+        "--link", choices=LINK_MODES, default="copy",
+        help="how to place static files in docs/ (hard and reflink fall back to copying)",
+    )
+    parser.add_argument(
+        "--compress", action="store_true",
+        help="write .gz (and .br, if brotli is installed) sidecars next to compressible outputs",
+    )
+    parser.add_argument(
+        "--compress-min-size", type=int, default=1024, metavar="BYTES",
+        help="do not compress outputs smaller than this",
+    )
+    parser.add_argument(
+        "--compress-max-ratio", type=float, default=0.9, metavar="RATIO",
+        help="only keep a sidecar at most this fraction of the original size",
+    )
+    parser.add_argument(
+        "--site-url", metavar="URL",
+        help="scheme and host the site is served from, e.g. https://example.com; enables sitemap.xml and feeds",
+    )
+    parser.add_argument(
+        "--site-author", metavar="NAME",
+        help="author named in feeds whose listing page has no author front matter (default: the site url's host)",
+    )
+    parser.add_argument(
+        "--fingerprint", action="store_true",
+        help="publish static files as name.<hash>.ext and rewrite links to them, listed in asset-manifest.json",
+    )
+    parser.add_argument("--drafts", action="store_true", help="also build pages marked draft: true")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the on-disk render caches")
+    parser.add_argument("--profile", action="store_true", help="time each build stage and print a report")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="slowest pages to list")
+    parser.add_argument("--profile-json", metavar="PATH", help="also write the profile report as JSON")
+    parser.add_argument(
+        "--explain", action="append", default=[], metavar="PAGE",
+        help="print why PAGE (a content or docs path) was or was not rebuilt",
+    )
+    parser.add_argument("--watch", action="store_true", help="serve: rebuild changed pages and static files")
+    parser.add_argument("--port", type=int, default=8888, help="serve: port to listen on")
+    args = parser.parse_args(argv)
+    args.command = command
+    return args
+
+
+def parse_targets(pairs):
+    targets = []
+    public_dirs = {os.path.normpath(dir_path_public)}
+    for pair in pairs:
+        if "=" not in pair:
+            raise ValueError(f"invalid --target value: {pair}")
+        basepath, public_dir = pair.split("=", 1)
+        if os.path.normpath(public_dir) in public_dirs:
+            raise ValueError(f"--target directory {public_dir} is already an output")
+        public_dirs.add(os.path.normpath(public_dir))
+        targets.append((basepath, public_dir))
+    return targets
+
+
+def parse_template_map(pairs):
+    templates = {}
+    for pair in pairs:
+        if "=" not in pair:
+            raise ValueError(f"invalid --template-for value: {pair}")
+        prefix, path = pair.split("=", 1)
+        templates[prefix] = path
+    return templates
+
+
+def relative_to(path, root):
+    rel_path = os.path.relpath(path, root)
+    if rel_path.startswith(".."):
+        return None
+    return rel_path
+
+
+# Every option that shapes the output, shared by build, serve, check-links
+# and --profile so that none of them builds docs/ differently.
+class BuildOptions:
+    def __init__(
+        self, basepath=default_basepath, jobs=1, templates=None, checksum=False, link="copy", use_cache=True,
+        compressor=None, targets=(), drafts=False, site_url=None, fingerprint=False, site_author=None,
+    ):
+        self.basepath = basepath
+        self.jobs = jobs
+        self.templates = templates or {}
+        self.checksum = checksum
+        self.link = link
+        self.use_cache = use_cache
+        self.compressor = compressor
+        self.targets = targets
+        self.drafts = drafts
+        self.site_url = site_url
+        self.fingerprint = fingerprint
+        self.site_author = site_author
+
+
+def build_options(args):
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    return BuildOptions(
+        args.basepath, jobs, parse_template_map(args.template_for), args.checksum, args.link, not args.no_cache,
+        make_compressor(args, jobs), parse_targets(args.target), args.drafts, args.site_url, args.fingerprint,
+        args.site_author,
+    )
+
+
+def make_compressor(args, jobs):
+    if not args.compress:
+        return None
+    return Compressor(args.compress_min_size, args.compress_max_ratio, threads=max(4, jobs))
+
+
+# Runs after every build and rebuild, since the stat check skips unchanged
+# outputs cheaply. Without a compressor, sidecars left by an earlier build
+# are removed, as they would no longer match the files next to them.
+def compress_outputs(manifest, compressor, public_dir=dir_path_public):
+    if compressor is None:
+        if not manifest.compressed:
+            return None
+        compressor, outputs = Compressor(), []
+    else:
+        outputs = [os.path.relpath(dest_path, public_dir) for dest_path in manifest.pages]
+        outputs += [synced_output(rel_path, record) for rel_path, record in manifest.assets.items()]
+        outputs += manifest.generated_files()
+    stats, manifest.compressed = compressor.run(public_dir, outputs, manifest.compressed)
+    return stats
+
+
+# Each extra target keeps its own manifest next to the main one, named
+# after its public directory. The hash of the whole path keeps directories
+# the readable part cannot tell apart (a/b and a_b) from sharing one.
+def target_manifest_path(public_dir):
+    public_dir = os.path.normpath(public_dir)
+    name = re.sub(r"[^\w.-]+", "_", public_dir).strip("_.")
+    return f"./.build_manifest.{name}.{hash_text(public_dir)[:10]}.json"
 
-    static_to_public(dir_path_public, dir_path_static)
+
+def load_targets(targets):
+    loaded = []
+    for basepath, public_dir in targets:
+        manifest = BuildManifest.load(target_manifest_path(public_dir), OUTPUT_VERSION)
+        loaded.append(Target(basepath, public_dir, manifest))
+    return loaded
+
+
+def sync_target(manifest, public_dir, checksum, link, jobs, fingerprint=False):
+    reason = manifest.needs_full_rebuild()
+    if reason is not None:
+        manifest.reset(reason)
+    stats, manifest.assets = sync_static(
+        dir_path_static, public_dir, manifest.assets, checksum, link, threads=max(4, jobs), fingerprint=fingerprint,
+    )
+    write_asset_manifest(manifest, public_dir, fingerprint)
+    return stats
+
+
+# The search index, sitemap and feeds are derived from the manifest's page
+# entries. The sitemap and feeds need absolute urls, so they are only
+# written (and otherwise removed) when the site url is known.
+def write_site_files(manifest, public_dir, basepath, site_url=None, drafts=False, site_author=None):
+    write_search_index(manifest, public_dir, basepath)
+    if site_url:
+        write_sitemap(manifest, public_dir, basepath, site_url)
+        write_feeds(manifest, public_dir, basepath, site_url, dir_path_content, drafts, site_author)
+    else:
+        manifest.replace_generated("sitemap", [], public_dir)
+        manifest.replace_generated("feeds", [], public_dir)
+
+
+def finish_target(manifest, public_dir, basepath, compressor, site_url=None, drafts=False, site_author=None):
+    manifest.remove_orphans(public_dir)
+    write_site_files(manifest, public_dir, basepath, site_url, drafts, site_author)
+    compress_stats = compress_outputs(manifest, compressor, public_dir)
+    manifest.save()
+    return compress_stats
+
+
+# Extra targets, (basepath, public_dir) pairs, are built from the same
+# renders as ./docs; each page is parsed and rendered once for all of them.
+def build(options):
+    basepath, jobs, checksum, link = options.basepath, options.jobs, options.checksum, options.link
+    drafts, site_url, fingerprint, compressor = options.drafts, options.site_url, options.fingerprint, options.compressor
+    manifest = BuildManifest.load(manifest_path, OUTPUT_VERSION)
+    targets = load_targets(options.targets)
+    if options.use_cache:
+        block_cache.load(os.path.join(cache_dir, "blocks.pickle"), OUTPUT_VERSION)
+        highlight_cache.load(os.path.join(cache_dir, "highlight.pickle"), HIGHLIGHTER_VERSION)
+        metadata_index.load(os.path.join(cache_dir, "metadata.json"))
+        image_sizes.load(os.path.join(cache_dir, "images.json"))
+
+    stats = sync_target(manifest, dir_path_public, checksum, link, jobs, fingerprint)
+    print(f"Static files: {stats}")
+    # Before any page is rendered: worker processes are handed the sizes
+    # and fingerprints as they start.
+    image_sizes.update(dir_path_static, manifest.assets)
+    fingerprints.update(manifest.assets, fingerprint)
+    for target in targets:
+        stats = sync_target(target.manifest, target.public_dir, checksum, link, jobs, fingerprint)
+        print(f"Static files ({target.public_dir}): {stats}")
     generate_pages_recursive(
         dir_path_content,
         template_path,
         dir_path_public,
         basepath,
+        manifest,
+        jobs,
+        options.templates,
+        targets,
+        drafts,
     ) 
+    compress_stats = finish_target(
+        manifest, dir_path_public, basepath, compressor, site_url, drafts, options.site_author,
+    )
+    for target in targets:
+        finish_target(
+            target.manifest, target.public_dir, target.basepath, compressor, site_url, drafts, options.site_author,
+        )
+    # Snippets are only highlighted when their block misses the block cache,
+    # so unused ones can be pruned only when every block was rendered afresh.
+    highlight_cache.save(prune=manifest.force is not None and not block_cache.stored)
+    block_cache.save(prune=manifest.force is not None)
+    metadata_index.save()
+    image_sizes.save()
+    print(
+        f"Rendered {manifest.rendered} pages, skipped {manifest.skipped} unchanged, "
+        f"removed {manifest.removed} stale"
+    )
+    for target in targets:
+        print(
+            f"Target {target.basepath} ({target.public_dir}): wrote {target.manifest.rendered} pages, "
+            f"skipped {target.manifest.skipped} unchanged, removed {target.manifest.removed} stale"
+        )
+    if compress_stats is not None:
+        print(f"Compression: {compress_stats}")
+    print(f"Block cache: {block_cache}")
+    print(f"Metadata index: {metadata_index}")
+    print(f"Image sizes: {image_sizes}")
+    if highlight_cache.hits or highlight_cache.misses:
+        print(f"Highlight cache: {highlight_cache}")
+    return manifest
 
-     
 
-main()
+def explain(manifest, paths):
+    for path in paths:
+        dest_path = os.path.normpath(path)
+        rel_path = relative_to(path, dir_path_content)
+        if rel_path is not None:
+            dest_path = os.path.normpath(page_dest_path(rel_path, dir_path_public))
+        if dest_path in manifest.reasons:
+            reason = manifest.reasons[dest_path]
+            print(f"{path}: rebuilt, {reason}" if reason is not None else f"{path}: up to date, skipped")
+        else:
+            print(f"{path}: not a page of this build")
 
 
+# Profiles a serial build, so every page is rendered in this process.
+def profile_build(args, options):
+    options.jobs = 1
+    profiler = Profiler()
+    profiler.install()
+    start = time.perf_counter()
+    try:
+        build(options)
+    finally:
+        profiler.uninstall()
+    elapsed = time.perf_counter() - start
+    print(profiler.report(elapsed, args.profile_top))
+    if args.profile_json:
+        profiler.dump_json(args.profile_json, elapsed, args.profile_top)
 
 
+# Templates picked with a template: front matter key are only known from
+# the pages, so they are gathered from the metadata index and from what the
+# manifest recorded for each page.
+def template_paths_in_use(templates, manifest):
+    paths = [template_path] + list(templates.values())
+    paths += [entry["meta"]["template"] for entry in metadata_index.entries.values() if entry["meta"].get("template")]
+    paths += [entry["template"] for entry in manifest.pages.values()]
+    return sorted({os.path.normpath(path) for path in paths})
 
 
+def rebuild_changed(changed, removed, options, manifest):
+    basepath, templates, link, drafts = options.basepath, options.templates, options.link, options.drafts
+    fingerprint = options.fingerprint
+    template_paths = set(template_paths_in_use(templates, manifest))
+    pages = {}
+    static_files = 0
+    refingerprinted = False
+    rendered = manifest.rendered
+    removed_pages = manifest.removed
+    changed_templates = []
+    for path in changed:
+        if os.path.normpath(path) in template_paths:
+            changed_templates.append(path)
+            continue
+        rel_path = relative_to(path, dir_path_content)
+        if rel_path is not None:
+            pages[os.path.normpath(page_dest_path(rel_path, dir_path_public))] = path
+            pages.update(manifest.listing_pages())
+            continue
+        rel_path = relative_to(path, dir_path_static)
+        if rel_path is not None:
+            previous = manifest.assets.get(rel_path)
+            copied, manifest.assets[rel_path] = sync_file(
+                dir_path_static, dir_path_public, rel_path, link=link, previous=previous, fingerprint=fingerprint,
+            )
+            static_files += copied
+            pages.update(manifest.pages_using_asset(rel_path))
+            output = synced_output(rel_path, manifest.assets[rel_path])
+            if previous is None or synced_output(rel_path, previous) != output:
+                if previous is not None:
+                    remove_synced_file(dir_path_public, synced_output(rel_path, previous))
+                refingerprinted = refingerprinted or fingerprint
+    for path in removed:
+        rel_path = relative_to(path, dir_path_content)
+        if rel_path is not None:
+            manifest.remove_output(page_dest_path(rel_path, dir_path_public), dir_path_public)
+            metadata_index.discard(path)
+            pages.update(manifest.listing_pages())
+            continue
+        rel_path = relative_to(path, dir_path_static)
+        if rel_path is not None:
+            previous = manifest.assets.pop(rel_path, None) or {}
+            static_files += remove_synced_file(dir_path_public, synced_output(rel_path, previous))
+            refingerprinted = refingerprinted or "output" in previous
+            pages.update(manifest.pages_using_asset(rel_path))
+    # A new fingerprint may be linked from any template; pages whose
+    # template links stay the same are skipped by their template hash.
+    if refingerprinted:
+        changed_templates = template_paths
+    for path in changed_templates:
+        pages.update(manifest.pages_using_template(path))
+    # Only pages whose inputs changed are passed on; the manifest still
+    # skips any whose recorded inputs turn out identical.
+    pages = [(source, dest_path) for dest_path, source in pages.items() if os.path.exists(source)]
+    image_sizes.update(dir_path_static, manifest.assets)
+    fingerprints.update(manifest.assets, fingerprint)
+    write_asset_manifest(manifest, dir_path_public, fingerprint)
+    metadata_index.update(source for source, _ in pages)
+    for source, dest_path in pages:
+        if metadata_index.get(source).get("draft") and not drafts:
+            manifest.remove_output(dest_path, dir_path_public)
+    generate_pages(pages, dir_path_content, template_path, basepath, manifest, templates=templates, drafts=drafts)
+    write_site_files(manifest, dir_path_public, basepath, options.site_url, drafts, options.site_author)
+    compress_outputs(manifest, options.compressor)
+    manifest.save()
+    block_cache.save()
+    highlight_cache.save()
+    metadata_index.save()
+    image_sizes.save()
+    return (
+        f"{manifest.rendered - rendered} page(s), removed {manifest.removed - removed_pages}, "
+        f"{static_files} static file(s)"
+    )
+
+
+# The build records every page's links next to the manifest, so checking them
+# needs no crawl of docs/: targets are looked up in the manifest's page and
+# static file entries.
+def check_site_links(options):
+    manifest = build(options)
+    broken = check_links(manifest, dir_path_public, options.basepath)
+    for source, line, url in broken:
+        print(f"{source}:{line}: broken link {url}")
+    print(f"Checked links of {len(manifest.pages)} pages: {len(broken)} broken")
+    return broken
+
+
+# The template cache and renderer stay loaded between rebuilds, so an edit
+# to one page only costs reading, rendering and writing that page.
+def serve_site(options, port, watch_changes):
+    # Watch rebuilds only update ./docs, so extra targets would go stale.
+    if options.targets:
+        raise ValueError("--target is only supported by build and check-links")
+    manifest = build(options)
+    server = start_server(dir_path_public, port)
+    try:
+        if watch_changes:
+            watched = [dir_path_content, dir_path_static] + template_paths_in_use(options.templates, manifest)
+
+            # A rebuilt page may have picked a template nobody used before.
+            def rebuild(changed, removed):
+                summary = rebuild_changed(changed, removed, options, manifest)
+                for path in template_paths_in_use(options.templates, manifest):
+                    if path not in watched:
+                        watched.append(path)
+                return summary
+
+            watch(watched, rebuild)
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    options = build_options(args)
+    if args.command == "serve":
+        serve_site(options, args.port, args.watch)
+    elif args.command == "check-links":
+        if check_site_links(options):
+            sys.exit(1)
+    elif args.profile:
+        profile_build(args, options)
+    else:
+        manifest = build(options)
+        explain(manifest, args.explain)
 
 
+if __name__ == "__main__":
+    main()
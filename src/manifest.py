@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from page_writer import replace_if_changed, write_if_changed
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Writes a page's links to its side file as they are found, one JSON
+# [url, line] pair per line, so a streamed page never holds all of them.
+# The file replaces the previous one only once close() is called, and only
+# if the two differ.
+class LinkWriter:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = open(path + ".tmp", "w")
+
+    def extend(self, links):
+        for link in links:
+            self.file.write(json.dumps(link, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+        replace_if_changed(self.path + ".tmp", self.path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.path + ".tmp")
+
+
+class BuildManifest:
+    def __init__(self, path, renderer_version):
+        self.path = path
+        # Per-page data too large for the manifest itself (links and search
+        # terms) lives in files under <manifest name>.pages/.
+        self.data_dir = os.path.splitext(path)[0] + ".pages"
+        self.renderer_version = renderer_version
+        self.loaded_version = None
+        self.force = None
+        self.pages = {}
+        self.assets = {}
+        self.compressed = {}
+        self.generated = {}
+        # The site url the sitemap was last written for.
+        self.site_url = None
+        self.saved = None
+        self.seen = set()
+        self.reasons = {}
+        self.rendered = 0
+        self.skipped = 0
+        self.removed = 0
+
+    @classmethod
+    def load(cls, path, renderer_version):
+        manifest = cls(path, renderer_version)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        manifest.loaded_version = data.get("renderer_version")
+        manifest.pages = data.get("pages", {})
+        manifest.assets = data.get("assets", {})
+        manifest.compressed = data.get("compressed", {})
+        manifest.generated = data.get("generated", {})
+        manifest.site_url = data.get("site_url")
+        manifest.saved = manifest.snapshot()
+        return manifest
+
+    def needs_full_rebuild(self):
+        if len(self.pages) == 0:
+            return "no previous build"
+        if self.loaded_version != self.renderer_version:
+            return f"renderer version changed from {self.loaded_version} to {self.renderer_version}"
+        return None
+
+    # Re-renders every page, but keeps the old entries around so outputs of
+    # removed sources can still be found and deleted afterwards.
+    def reset(self, reason="full rebuild"):
+        self.force = reason
+
+    # Every page entry records the inputs its output was built from: the
+    # source, the template, the static files the page links to and, for a
+    # listing page, a hash of the pages it lists. The first
+    # input that no longer matches is the reason the page is rebuilt, kept in
+    # self.reasons for --explain; None means the output is up to date.
+    def stale_reason(self, dest_path, source_hash, template_path, template_hash, basepath, listing_hash=None):
+        dest_path = os.path.normpath(dest_path)
+        self.seen.add(dest_path)
+        self.reasons[dest_path] = reason = self.find_stale_input(
+            dest_path, source_hash, os.path.normpath(template_path), template_hash, basepath, listing_hash,
+        )
+        return reason
+
+    def find_stale_input(self, dest_path, source_hash, template_path, template_hash, basepath, listing_hash=None):
+        entry = self.pages.get(dest_path)
+        if self.force:
+            return self.force
+        if entry is None:
+            return "new page"
+        if not os.path.exists(dest_path):
+            return "output is missing"
+        if entry["source_hash"] != source_hash:
+            return f"source {entry['source']} changed"
+        if entry["template"] != template_path:
+            return f"template changed from {entry['template']} to {template_path}"
+        if entry["template_hash"] != template_hash:
+            return f"template {template_path} changed"
+        if entry["basepath"] != basepath:
+            return f"basepath changed from {entry['basepath']} to {basepath}"
+        if entry.get("listing") != listing_hash:
+            return "listed pages changed"
+        for rel_path, stamp in entry["assets"].items():
+            current = self.assets.get(rel_path)
+            if current is None:
+                return f"static file {rel_path} was removed"
+            if current != stamp:
+                return f"static file {rel_path} changed"
+        return None
+
+    # links=None means they were already written through link_writer().
+    def record(
+        self, dest_path, source_path, source_hash, template_path, template_hash, basepath, links=(), assets=(), search=None,
+        listing_hash=None,
+    ):
+        dest_path = os.path.normpath(dest_path)
+        if links is not None:
+            self.write_links(dest_path, links)
+        self.seen.add(dest_path)
+        previous = self.pages.get(dest_path)
+        if previous is not None and previous["source_hash"] == source_hash and "modified" in previous:
+            modified = previous["modified"]
+        else:
+            modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.pages[dest_path] = {
+            "source": os.path.normpath(source_path),
+            "source_hash": source_hash,
+            "template": os.path.normpath(template_path),
+            "template_hash": template_hash,
+            "basepath": basepath,
+            "assets": {rel_path: self.assets[rel_path] for rel_path in assets},
+            "modified": modified,
+        }
+        if search is not None:
+            self.pages[dest_path]["title"] = search["title"]
+            self.write_terms(dest_path, search["terms"])
+        else:
+            self.remove_side_file(dest_path, ".terms")
+        if listing_hash is not None:
+            self.pages[dest_path]["listing"] = listing_hash
+        self.rendered += 1
+
+    def side_path(self, dest_path, ext):
+        key = hashlib.sha1(os.path.normpath(dest_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.data_dir, key[:20] + ext)
+
+    def links_path(self, dest_path):
+        return self.side_path(dest_path, ".links")
+
+    def link_writer(self, dest_path):
+        return LinkWriter(self.links_path(dest_path))
+
+    def write_links(self, dest_path, links):
+        if not links:
+            self.remove_side_file(dest_path, ".links")
+            return
+        writer = self.link_writer(dest_path)
+        writer.extend(links)
+        writer.close()
+
+    def write_terms(self, dest_path, terms):
+        os.makedirs(self.data_dir, exist_ok=True)
+        text = json.dumps(terms, ensure_ascii=False, separators=(",", ":"))
+        write_if_changed(self.side_path(dest_path, ".terms"), text.encode("utf-8"))
+
+    def remove_side_file(self, dest_path, ext):
+        path = self.side_path(dest_path, ext)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # Yields the [url, line] links recorded for the page, reading its side
+    # file line by line.
+    def page_links(self, dest_path):
+        path = self.links_path(dest_path)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            for line in f:
+                yield json.loads(line)
+
+    # The {term: count} recorded for the page, empty if there is none.
+    def page_terms(self, dest_path):
+        try:
+            with open(self.side_path(dest_path, ".terms")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Both return {dest_path: source_path} for the pages built from the input.
+    def pages_using_template(self, template_path):
+        template_path = os.path.normpath(template_path)
+        return {dest_path: entry["source"] for dest_path, entry in self.pages.items() if entry["template"] == template_path}
+
+    def pages_using_asset(self, rel_path):
+        return {dest_path: entry["source"] for dest_path, entry in self.pages.items() if rel_path in entry["assets"]}
+
+    def listing_pages(self):
+        return {dest_path: entry["source"] for dest_path, entry in self.pages.items() if "listing" in entry}
+
+    # Site-wide files derived from the page entries (search index, sitemap,
+    # feeds) are listed by kind, so a kind's files that are no longer
+    # produced can be removed.
+    def replace_generated(self, kind, rel_paths, root):
+        rel_paths = sorted(rel_paths)
+        for rel_path in self.generated.get(kind, []):
+            if rel_path not in rel_paths:
+                path = os.path.join(root, rel_path)
+                if os.path.exists(path):
+                    os.remove(path)
+                    remove_empty_dirs(os.path.dirname(path), root)
+        if rel_paths:
+            self.generated[kind] = rel_paths
+        else:
+            self.generated.pop(kind, None)
+        return rel_paths
+
+    def generated_files(self):
+        return [rel_path for rel_paths in self.generated.values() for rel_path in rel_paths]
+
+    def skip(self):
+        self.skipped += 1
+
+    def remove_orphans(self, root):
+        removed = [dest_path for dest_path in self.pages if dest_path not in self.seen]
+        for dest_path in removed:
+            self.remove_output(dest_path, root)
+        return removed
+
+    def remove_output(self, dest_path, root):
+        dest_path = os.path.normpath(dest_path)
+        self.seen.discard(dest_path)
+        self.reasons[dest_path] = "source was removed"
+        self.pages.pop(dest_path, None)
+        self.remove_side_file(dest_path, ".links")
+        self.remove_side_file(dest_path, ".terms")
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), root)
+            self.removed += 1
+
+    def state(self):
+        return {
+            "renderer_version": self.renderer_version,
+            "pages": self.pages,
+            "assets": self.assets,
+            "compressed": self.compressed,
+            "generated": self.generated,
+            "site_url": self.site_url,
+        }
+
+    # Entries are replaced, never changed in place, so copying the top-level
+    # mappings is enough to tell later whether anything changed.
+    def snapshot(self):
+        return {key: dict(value) if isinstance(value, dict) else value for key, value in self.state().items()}
+
+    # Skipped when nothing changed since the manifest was loaded or last
+    # saved, so a no-op build or rebuild costs no encoding or write. The
+    # compact encoding keeps json on its C encoder (indent does not).
+    def changed(self):
+        return self.state() != self.saved
+
+    def save(self):
+        if not self.changed():
+            return
+        text = json.dumps(self.state(), separators=(",", ":"), sort_keys=True)
+        write_if_changed(self.path, text.encode("utf-8"))
+        self.saved = self.snapshot()
+
+
+def remove_empty_dirs(dir_path, root):
+    dir_path = os.path.normpath(dir_path)
+    root = os.path.normpath(root)
+    while dir_path != root and os.path.isdir(dir_path) and len(os.listdir(dir_path)) == 0:
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
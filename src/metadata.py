@@ -0,0 +1,187 @@
+import io
+import os
+import re
+from datetime import datetime
+from htmlnode import LeafNode, ParentNode
+from json_cache import JsonCache
+
+FRONT_MATTER_DELIMITER = "---"
+TITLE_PATTERN = re.compile(r"^# (.*)$", re.MULTILINE)
+LIST_VALUE_PATTERN = re.compile(r"^\[(.*)\]$")
+
+# Bump when the stored metadata changes shape, to rescan every source.
+METADATA_VERSION = 1
+
+
+def find_title(lines):
+    for line in lines:
+        if line.startswith("# "):
+            heading = line.strip("# ")
+            heading = heading.strip()
+            return heading
+
+
+def parse_value(key, value):
+    value = value.strip()
+    if key == "tags":
+        match = LIST_VALUE_PATTERN.match(value)
+        if match:
+            value = match.group(1)
+        return [tag.strip().strip("\"'") for tag in value.split(",") if tag.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if key == "draft":
+        if value.lower() not in ("true", "false", "yes", "no"):
+            raise ValueError(f"draft must be true or false, not {value}")
+        return value.lower() in ("true", "yes")
+    if key == "date":
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"invalid date {value}, expected YYYY-MM-DD") from None
+    return value
+
+
+# Front matter is a block of "key: value" lines between two "---" lines at
+# the very top of the file. Reads it from any iterable of lines and returns
+# (metadata, number of lines it spans); only the front matter is consumed,
+# plus the first line when there is none.
+def read_front_matter(lines):
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None or first.rstrip() != FRONT_MATTER_DELIMITER:
+        return {}, 0
+    meta = {}
+    for number, line in enumerate(lines, 2):
+        line = line.rstrip()
+        if line == FRONT_MATTER_DELIMITER:
+            return meta, number
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if ":" not in line:
+            raise ValueError(f"invalid front matter on line {number}: {line}")
+        key, value = line.split(":", 1)
+        key = key.strip().lower()
+        meta[key] = parse_value(key, value)
+    raise ValueError("front matter is not closed with ---")
+
+
+# The front matter lines are blanked rather than removed, so line numbers in
+# the body (e.g. of links) still match the source file.
+def split_front_matter(markdown):
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    meta, count = read_front_matter(io.StringIO(markdown))
+    if count == 0:
+        return meta, markdown
+    end = -1
+    for _ in range(count):
+        end = markdown.find("\n", end + 1)
+        if end == -1:
+            return meta, ""
+    return meta, "\n" * count + markdown[end + 1 :]
+
+
+def skip_front_matter(lines, count):
+    for number, line in enumerate(lines):
+        yield "\n" if number < count else line
+
+
+def extract_title(markdown):
+    match = TITLE_PATTERN.search(markdown)
+    if match is None:
+        return None
+    return match.group(0).strip("# ").strip()
+
+
+# Reads the front matter and, when it has no title, the lines up to the
+# first heading; the rest of the file is never read.
+def scan_metadata(path):
+    with open(path) as f:
+        meta, count = read_front_matter(f)
+        if "title" not in meta:
+            f.seek(0)
+            meta["title"] = find_title(line.rstrip("\n") for line in skip_front_matter(f, count))
+    return meta
+
+
+def page_url(rel_path):
+    url = "/" + os.path.splitext(rel_path)[0].replace(os.sep, "/") + ".html"
+    if url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+    return url
+
+
+# Site-wide metadata of every source, kept in .cache/metadata.json and
+# rescanned only for files whose size or mtime changed, so listings know
+# every page's title, date and tags without reading page bodies.
+class MetadataIndex(JsonCache):
+    version = METADATA_VERSION
+    key = "sources"
+
+    def __init__(self):
+        super().__init__()
+        self.scanned = 0
+
+    # With prune=True, sources are the whole site and entries of any other
+    # file are dropped.
+    def update(self, sources, prune=False):
+        sources = [os.path.normpath(source) for source in sources]
+        for source in sources:
+            stat = os.stat(source)
+            entry = self.entries.get(source)
+            if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            try:
+                meta = scan_metadata(source)
+            except ValueError as e:
+                raise ValueError(f"{source}: {e}") from e
+            self.entries[source] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "meta": meta}
+            self.scanned += 1
+        if prune:
+            keep = set(sources)
+            self.entries = {source: entry for source, entry in self.entries.items() if source in keep}
+
+    def discard(self, source):
+        self.entries.pop(os.path.normpath(source), None)
+
+    def get(self, source):
+        entry = self.entries.get(os.path.normpath(source))
+        return entry["meta"] if entry is not None else {}
+
+    # A listing is "DIR" for the pages under content/DIR or "tag:NAME" for
+    # the pages tagged NAME. Returns [url, title, date] items, newest first.
+    def listing(self, query, source, dir_path_content, drafts=False):
+        source = os.path.normpath(source)
+        tag = query[len("tag:") :] if query.startswith("tag:") else None
+        prefix = query.strip("/") + "/"
+        items = []
+        for path in sorted(self.entries):
+            meta = self.entries[path]["meta"]
+            if path == source or (meta.get("draft") and not drafts):
+                continue
+            rel_path = os.path.relpath(path, dir_path_content)
+            if tag is not None:
+                if tag not in meta.get("tags", []):
+                    continue
+            elif not rel_path.replace(os.sep, "/").startswith(prefix):
+                continue
+            items.append([page_url(rel_path), meta.get("title") or page_url(rel_path), meta.get("date")])
+        items.sort(key=lambda item: item[2] or "", reverse=True)
+        return items
+
+    def __repr__(self):
+        return f"{len(self.entries)} sources, {self.scanned} scanned"
+
+
+def listing_to_html_node(items):
+    children = []
+    for url, title, date in items:
+        item = [LeafNode("a", title, {"href": url})]
+        if date:
+            item.append(LeafNode("time", date, {"datetime": date}))
+        children.append(ParentNode("li", item))
+    return ParentNode("ul", children, {"class": "listing"})
+
+
+metadata_index = MetadataIndex()
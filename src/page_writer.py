@@ -0,0 +1,99 @@
+import filecmp
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Replaces path with data through a temporary file and a rename, so anyone
+# reading the file sees either the old or the new content, never a partial
+# write. Identical content is left untouched, keeping its mtime.
+def write_if_changed(path, data):
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+# For files streamed to tmp_path: moves it over path unless the two are
+# identical, in which case path keeps its mtime and tmp_path is removed.
+def replace_if_changed(tmp_path, path):
+    try:
+        if os.path.getsize(path) == os.path.getsize(tmp_path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            return False
+    except FileNotFoundError:
+        pass
+    os.replace(tmp_path, path)
+    return True
+
+
+# Write-behind queue for rendered pages: submit() returns as soon as the
+# page is queued, so rendering continues while earlier pages are written by
+# a small thread pool. At most max_pending pages wait in memory; submit()
+# blocks when the writers fall behind. Each output directory is created
+# once, from the submitting thread. close() waits for every write and
+# raises the first error.
+class PageWriter:
+    def __init__(self, write, threads=4, max_pending=32):
+        self.write = write
+        self.executor = ThreadPoolExecutor(max_workers=threads) if threads > 0 else None
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.dirs = set()
+        self.written = 0
+        self.unchanged = 0
+        self.error = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(raise_error=exc_type is None)
+
+    def submit(self, dest_path, html):
+        if self.error is not None:
+            raise self.error
+        dir_path = os.path.dirname(dest_path)
+        if dir_path not in self.dirs:
+            os.makedirs(dir_path, exist_ok=True)
+            self.dirs.add(dir_path)
+        if self.executor is None:
+            self.count(self.write(dest_path, html))
+            return
+        self.slots.acquire()
+        self.executor.submit(self.write, dest_path, html).add_done_callback(self.done)
+
+    def done(self, future):
+        self.slots.release()
+        error = future.exception()
+        if error is None:
+            self.count(future.result())
+        elif self.error is None:
+            self.error = error
+
+    def count(self, written):
+        with self.lock:
+            if written:
+                self.written += 1
+            else:
+                self.unchanged += 1
+
+    def close(self, raise_error=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if raise_error and self.error is not None:
+            raise self.error
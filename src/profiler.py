@@ -0,0 +1,116 @@
+import json
+import time
+import block
+import generate_page
+import htmlnode
+import template
+
+# Stages are measured by swapping timing wrappers in for the pipeline
+# functions while profiling is on, so a normal build runs the untouched
+# functions and pays nothing. Wrappers only see the current process, which
+# is why profiled builds render and write serially.
+STAGES = [
+    ("read", generate_page, "read_source"),
+    ("blocks", block, "markdown_to_blocks"),
+    ("classify", block, "classify_block"),
+    ("inline", block, "text_to_children"),
+    ("serialize", htmlnode.ParentNode, "to_html"),
+    ("template", template.Template, "render"),
+    ("write", generate_page, "write_page"),
+]
+
+
+class Profiler:
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+        self.pages = []
+        self.patched = []
+
+    def add(self, stage, elapsed):
+        self.totals[stage] = self.totals.get(stage, 0.0) + elapsed
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def timed(self, stage, func):
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, perf_counter() - start)
+
+        return wrapper
+
+    def timed_page(self, func):
+        perf_counter = time.perf_counter
+
+        def wrapper(job):
+            start = perf_counter()
+            try:
+                return func(job)
+            finally:
+                self.pages.append((perf_counter() - start, job[0]))
+
+        return wrapper
+
+    def install(self):
+        for stage, owner, name in STAGES:
+            original = owner.__dict__.get(name, getattr(owner, name))
+            self.patched.append((owner, name, name in owner.__dict__, original))
+            setattr(owner, name, self.timed(stage, getattr(owner, name)))
+        self.patched.append((generate_page, "render_job", True, generate_page.render_job))
+        generate_page.render_job = self.timed_page(generate_page.render_job)
+        # Writes would otherwise overlap rendering on background threads.
+        self.patched.append((generate_page, "WRITE_THREADS", True, generate_page.WRITE_THREADS))
+        generate_page.WRITE_THREADS = 0
+
+    def uninstall(self):
+        for owner, name, owned, original in reversed(self.patched):
+            if owned:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self.patched = []
+
+    def summary(self, elapsed, top=10):
+        stages = [stage for stage, _, _ in STAGES]
+        stages += [stage for stage in self.totals if stage not in stages]
+        measured = sum(self.totals.values())
+        slowest = sorted(self.pages, reverse=True)[:top]
+        return {
+            "elapsed": elapsed,
+            "pages": len(self.pages),
+            "pages_per_second": len(self.pages) / elapsed if elapsed > 0 else 0.0,
+            "stages": {
+                stage: {"seconds": self.totals.get(stage, 0.0), "calls": self.calls.get(stage, 0)}
+                for stage in stages
+            },
+            "other": max(elapsed - measured, 0.0),
+            "slowest_pages": [{"path": path, "seconds": seconds} for seconds, path in slowest],
+        }
+
+    def report(self, elapsed, top=10):
+        summary = self.summary(elapsed, top)
+        lines = [
+            f"Build profile: {summary['pages']} pages rendered in {elapsed:.3f} s "
+            f"({summary['pages_per_second']:.1f} pages/s)",
+            f"  {'stage':<10} {'seconds':>9} {'%':>6} {'calls':>9}",
+        ]
+        rows = [(stage, data["seconds"], data["calls"]) for stage, data in summary["stages"].items()]
+        rows.append(("other", summary["other"], ""))
+        for stage, seconds, calls in rows:
+            percent = 100 * seconds / elapsed if elapsed > 0 else 0.0
+            lines.append(f"  {stage:<10} {seconds:>9.4f} {percent:>5.1f}% {calls:>9}".rstrip())
+        if summary["slowest_pages"]:
+            lines.append(f"Slowest {len(summary['slowest_pages'])} pages:")
+            for page in summary["slowest_pages"]:
+                lines.append(f"  {page['seconds'] * 1000:>9.2f} ms  {page['path']}")
+        return "\n".join(lines)
+
+    def dump_json(self, path, elapsed, top=10):
+        summary = self.summary(elapsed, top)
+        summary["timestamp"] = time.time()
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=1)
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from page_writer import write_if_changed
+
+
+def block_digest(block):
+    return hashlib.sha1(block.encode("utf-8")).digest()
+
+
+# The store is two files: <name>.data holds the pickled nodes one after
+# another, behind DATA_ID_SIZE random bytes that name this copy of it, and
+# <path> holds the version, the save count, the data file's id and valid
+# size, and an index of digest -> (offset, length, save that last used it).
+DATA_ID_SIZE = 16
+
+
+# Rendered nodes are shared between every page that repeats a block, so they
+# must never be mutated after rendering; basepath rewriting happens at
+# serialization time for exactly that reason. It also means a rendered node
+# can be pickled later than it is rendered: fresh nodes are pickled a batch
+# at a time, when maxsize of them piled up or at save time, so the build
+# neither pickles block by block nor keeps every rendered node alive.
+class BlockCache:
+    def __init__(self, maxsize=4096, store_limit=256 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.store_limit = store_limit
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.path = None
+        self.data_path = None
+        self.version = None
+        self.stored = {}
+        self.saves = 0
+        self.data_id = None
+        self.data_size = 0
+        self.file = None
+        self.file_pid = None
+        # Digests used since the last save, and the blocks rendered since
+        # then: nodes not pickled yet, and pickled ones.
+        self.used = set()
+        self.fresh = {}
+        self.pickled = {}
+        self.reported = set()
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, block, render_block):
+        entry = self.entries.get(block)
+        if entry is not None:
+            self.entries.move_to_end(block)
+            self.hits += 1
+            node, digest = entry
+            if digest is not None:
+                self.used.add(digest)
+            return node
+
+        digest = None
+        if self.path is not None:
+            digest = block_digest(block)
+            data = self.read_stored(digest)
+            if data is not None:
+                self.hits += 1
+                node = pickle.loads(data)
+                self.used.add(digest)
+                self.add(block, node, digest)
+                return node
+
+        self.misses += 1
+        node = render_block(block)
+        if digest is not None:
+            self.used.add(digest)
+            self.fresh[digest] = node
+            if len(self.fresh) >= self.maxsize:
+                self.pickle_fresh()
+        self.add(block, node, digest)
+        return node
+
+    def pickle_fresh(self):
+        for digest, node in self.fresh.items():
+            self.pickled[digest] = pickle.dumps(node, pickle.HIGHEST_PROTOCOL)
+        self.fresh = {}
+
+    def add(self, block, node, digest):
+        self.entries[block] = (node, digest)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Only the index is read when the store is loaded; nodes are read from
+    # the data file as blocks hit. A data file that is not the one the
+    # index was written for (another id) discards the store.
+    def load(self, path, version):
+        self.entries.clear()
+        self.close()
+        self.path = path
+        self.data_path = os.path.splitext(path)[0] + ".data"
+        self.version = version
+        self.stored = {}
+        self.saves = 0
+        self.data_id = None
+        self.data_size = 0
+        self.used = set()
+        self.fresh = {}
+        self.pickled = {}
+        try:
+            with open(path, "rb") as f:
+                header = pickle.load(f)
+            with open(self.data_path, "rb") as f:
+                data_id = f.read(DATA_ID_SIZE)
+                data_size = f.seek(0, os.SEEK_END)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return
+        if not isinstance(header, dict) or header.get("version") != version or header.get("data_id") != data_id:
+            return
+        self.data_id = data_id
+        self.data_size = min(header["data_size"], data_size)
+        self.saves = header["saves"]
+        self.stored = {
+            digest: record for digest, record in header["index"].items() if record[0] + record[1] <= self.data_size
+        }
+
+    # The handle is opened again in a forked worker, which must not share
+    # the parent's file position.
+    def read_stored(self, digest):
+        record = self.stored.get(digest)
+        if record is None:
+            return None
+        try:
+            if self.file is None or self.file_pid != os.getpid():
+                self.file = open(self.data_path, "rb")
+                self.file_pid = os.getpid()
+            self.file.seek(record[0])
+            return self.file.read(record[1])
+        except OSError:
+            return None
+
+    def close(self):
+        if self.file is not None and self.file_pid == os.getpid():
+            self.file.close()
+        self.file = None
+
+    # Nothing is written unless a block missed the store, or, with
+    # prune=True (after a build that rendered every page), some stored block
+    # went unused and is dropped so blocks removed from the site expire.
+    # New blocks are appended to the data file and only the index is
+    # rewritten. Beyond store_limit bytes the least recently used blocks
+    # are dropped, and once dropped blocks take up more of the data file
+    # than live ones, it is compacted.
+    def save(self, prune=False):
+        if self.path is None:
+            return
+        self.pickle_fresh()
+        if not self.pickled and (not prune or self.used.issuperset(self.stored)):
+            return
+        saves = self.saves + 1
+        index = {}
+        for digest, record in self.stored.items():
+            if digest in self.used:
+                index[digest] = (record[0], record[1], saves)
+            elif not prune:
+                index[digest] = record
+        new = {digest: data for digest, data in self.pickled.items() if digest not in index}
+        live = sum(record[1] for record in index.values()) + sum(len(data) for data in new.values())
+        if live > self.store_limit:
+            blocks = [(record[2], digest, record[1]) for digest, record in index.items()]
+            blocks += [(saves, digest, len(data)) for digest, data in new.items()]
+            blocks.sort(key=lambda block: block[0], reverse=True)
+            keep = set()
+            live = 0
+            for _, digest, length in blocks:
+                if live + length > self.store_limit:
+                    break
+                keep.add(digest)
+                live += length
+            index = {digest: record for digest, record in index.items() if digest in keep}
+            new = {digest: data for digest, data in new.items() if digest in keep}
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        dead = self.data_size - DATA_ID_SIZE - sum(record[1] for record in index.values())
+        if self.data_id is None or dead > live:
+            self.compact(index, new, saves)
+        else:
+            self.close()
+            with open(self.data_path, "r+b") as f:
+                f.truncate(self.data_size)
+                f.seek(self.data_size)
+                for digest, data in new.items():
+                    index[digest] = (self.data_size, len(data), saves)
+                    f.write(data)
+                    self.data_size += len(data)
+        header = {
+            "version": self.version, "saves": saves, "data_id": self.data_id, "data_size": self.data_size,
+            "index": index,
+        }
+        write_if_changed(self.path, pickle.dumps(header, pickle.HIGHEST_PROTOCOL))
+        self.stored = index
+        self.saves = saves
+        self.used = set()
+        self.pickled = {}
+
+    # Writes a new data file holding only the indexed and new blocks, and
+    # updates index to their offsets in it.
+    def compact(self, index, new, saves):
+        data_id = os.urandom(DATA_ID_SIZE)
+        parts = [data_id]
+        offset = DATA_ID_SIZE
+        for digest, (_, length, last_used) in list(index.items()):
+            data = self.read_stored(digest)
+            if data is None or len(data) != length:
+                del index[digest]
+                continue
+            parts.append(data)
+            index[digest] = (offset, length, last_used)
+            offset += length
+        for digest, data in new.items():
+            parts.append(data)
+            index[digest] = (offset, len(data), saves)
+            offset += len(data)
+        self.close()
+        write_if_changed(self.data_path, b"".join(parts))
+        self.data_id = data_id
+        self.data_size = offset
+
+    # Worker processes render with their own copy of the cache. Each one
+    # loads the store's index itself (nothing is inherited under spawn) and
+    # reports its counters, the digests it used and its newly rendered
+    # blocks, pickled, back with every page, so the parent saves and prunes
+    # as if it had rendered them.
+    def start_worker(self, path, version):
+        if path is not None and self.path != path:
+            self.load(path, version)
+        self.hits = 0
+        self.misses = 0
+        self.used = set()
+        self.fresh = {}
+        self.pickled = {}
+        self.reported = set()
+
+    def take_usage(self):
+        used = self.used - self.reported
+        self.reported.update(used)
+        self.pickle_fresh()
+        usage = (self.hits, self.misses, used, self.pickled)
+        self.hits = 0
+        self.misses = 0
+        self.pickled = {}
+        return usage
+
+    def merge_usage(self, usage):
+        hits, misses, used, pickled = usage
+        self.hits += hits
+        self.misses += misses
+        self.used.update(used)
+        self.pickled.update(pickled)
+
+    def __repr__(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
@@ -0,0 +1,97 @@
+import json
+import os
+import re
+from collections import Counter
+from page_writer import write_if_changed
+from textnode import TextType
+
+TERM_PATTERN = re.compile(r"\w\w+")
+SEARCH_DIR = "search"
+# Only a page's most frequent terms are indexed, so one huge page cannot
+# dominate the index. A streamed page's counts are trimmed back to them
+# whenever they grow past SEARCH_TERMS_BUFFER distinct terms.
+SEARCH_MAX_TERMS = 2000
+SEARCH_TERMS_BUFFER = 10 * SEARCH_MAX_TERMS
+
+
+# The words of a block's inline (text_type, text, url) tokens, as gathered
+# while the block is rendered, so the rendered tree is never walked for them.
+# Only inline text has tokens: code blocks are left out, being mostly
+# identifiers, and so is image alt text. They are returned as one
+# space-separated string, which is cached with the block's node and is far
+# smaller to pickle than a Counter or a list.
+def token_terms(tokens):
+    text = " ".join([text for text_type, text, _ in tokens if text_type is not TextType.IMAGE])
+    return " ".join(TERM_PATTERN.findall(text.lower()))
+
+
+# Ties are broken by the term, so the same counts always keep the same terms.
+def top_terms(counts, limit=SEARCH_MAX_TERMS):
+    if len(counts) <= limit:
+        return dict(counts)
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit])
+
+
+def trim_terms(counts):
+    if len(counts) <= SEARCH_TERMS_BUFFER:
+        return counts
+    return Counter(top_terms(counts))
+
+
+# Totals the terms of every block of a page (see token_terms).
+def page_terms(block_terms):
+    counts = Counter()
+    for terms in block_terms:
+        counts.update(terms.split())
+    return top_terms(counts)
+
+
+def search_entry(title, terms):
+    return {"title": title, "terms": terms}
+
+
+def page_url(dest_path, public_dir, basepath):
+    rel_path = os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+    if rel_path == "index.html" or rel_path.endswith("/index.html"):
+        rel_path = rel_path[: -len("index.html")]
+    return basepath + rel_path
+
+
+def shard_name(term):
+    first = term[0]
+    return first if "a" <= first <= "z" or "0" <= first <= "9" else "_"
+
+
+# The index is built from the per-page term counts the manifest keeps in
+# its side files, so only pages rendered in this build were tokenized, and
+# it is left alone when the manifest did not change and the files are all
+# there. It is written as
+# search/pages.json, a list of [url, title] whose positions are page ids,
+# and one search/terms-<c>.json per first character of the terms, mapping
+# each term to a flat [page id, count, page id, count, ...] posting list.
+# Files whose content is unchanged are not rewritten. Returns the rel paths
+# of the index files under public_dir.
+def write_search_index(manifest, public_dir, basepath):
+    previous = manifest.generated.get("search")
+    if previous and not manifest.changed():
+        if all(os.path.exists(os.path.join(public_dir, rel_path)) for rel_path in previous):
+            return previous
+    pages = []
+    shards = {}
+    for dest_path in sorted(manifest.pages):
+        entry = manifest.pages[dest_path]
+        if "title" not in entry:
+            continue
+        page_id = len(pages)
+        pages.append([page_url(dest_path, public_dir, basepath), entry["title"]])
+        for term, count in manifest.page_terms(dest_path).items():
+            shards.setdefault(shard_name(term), {}).setdefault(term, []).extend((page_id, count))
+
+    files = {f"{SEARCH_DIR}/pages.json": pages}
+    for name, postings in shards.items():
+        files[f"{SEARCH_DIR}/terms-{name}.json"] = postings
+    os.makedirs(os.path.join(public_dir, SEARCH_DIR), exist_ok=True)
+    for rel_path, data in files.items():
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        write_if_changed(os.path.join(public_dir, rel_path), text.encode("utf-8"))
+    return manifest.replace_generated("search", files, public_dir)
@@ -0,0 +1,67 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+def snapshot(paths):
+    files = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dir_path, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                files[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    changed = [path for path, key in new.items() if old.get(path) != key]
+    removed = [path for path in old if path not in new]
+    return changed, removed
+
+
+def start_server(directory, port):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {directory} at http://localhost:{port}/")
+    return server
+
+
+# Polls mtimes rather than relying on inotify so it works the same on every
+# platform; a content tree of tens of thousands of files stats in well under
+# the poll interval. on_change may append to paths; a path added that way
+# starts out as it is when first seen, not as a change.
+def watch(paths, on_change, interval=0.5):
+    previous = snapshot(paths)
+    known = set(paths)
+    print(f"Watching {', '.join(paths)} for changes")
+    while True:
+        time.sleep(interval)
+        added = [path for path in paths if path not in known]
+        if added:
+            previous.update(snapshot(added))
+            known.update(added)
+        current = snapshot(paths)
+        changed, removed = diff_snapshots(previous, current)
+        previous = current
+        if not changed and not removed:
+            continue
+        start = time.perf_counter()
+        try:
+            summary = on_change(changed, removed)
+        except Exception as e:
+            print(f"Rebuild failed: {e}")
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Rebuilt {summary} in {elapsed:.1f} ms")
@@ -0,0 +1,108 @@
+import os
+from urllib.parse import quote
+from htmlnode import escape_text
+from page_writer import replace_if_changed
+from search_index import page_url
+
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+# Limits of one sitemap file set by the sitemaps.org protocol.
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = f'{XML_DECLARATION}<urlset xmlns="{SITEMAP_NAMESPACE}">\n'
+URLSET_CLOSE = "</urlset>\n"
+
+
+def absolute_url(site_url, path):
+    return site_url.rstrip("/") + quote(path, safe="/%:@&=+$,;~!*'()")
+
+
+# Streams <url> entries into sitemap-N.xml shards, starting a new shard
+# before one would exceed the protocol's url count or byte size. Shards are
+# written to temporary files and only replace the old ones if they differ.
+class SitemapWriter:
+    def __init__(self, public_dir, max_urls=SITEMAP_MAX_URLS, max_bytes=SITEMAP_MAX_BYTES):
+        self.public_dir = public_dir
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.shards = []
+        self.file = None
+        self.urls = 0
+        self.size = 0
+        self.lastmod = ""
+
+    def add(self, loc, lastmod):
+        lastmod_tag = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+        entry = f"<url><loc>{escape_text(loc)}</loc>{lastmod_tag}</url>\n"
+        size = len(entry.encode("utf-8"))
+        if self.file is None or self.urls == self.max_urls or self.size + size + len(URLSET_CLOSE) > self.max_bytes:
+            self.open_shard()
+        self.file.write(entry)
+        self.urls += 1
+        self.size += size
+        self.lastmod = max(self.lastmod, lastmod)
+
+    def open_shard(self):
+        self.close_shard()
+        rel_path = f"sitemap-{len(self.shards) + 1}.xml"
+        self.file = open(os.path.join(self.public_dir, rel_path) + ".tmp", "w", encoding="utf-8")
+        self.file.write(URLSET_OPEN)
+        self.shards.append([rel_path, ""])
+        self.urls = 0
+        self.size = len(URLSET_OPEN.encode("utf-8"))
+
+    def close_shard(self):
+        if self.file is None:
+            return
+        self.file.write(URLSET_CLOSE)
+        self.file.close()
+        self.file = None
+        self.shards[-1][1] = self.lastmod
+        self.lastmod = ""
+
+    # Returns [rel_path, lastmod] of each shard, with the temporary files
+    # still to be moved into place.
+    def close(self):
+        if self.file is None:
+            self.open_shard()
+        self.close_shard()
+        return self.shards
+
+
+# A single shard is published as sitemap.xml itself; more shards are listed
+# by a sitemap index in sitemap.xml. Returns the rel paths written. Like the
+# search index, nothing is rebuilt when no page entry changed, the site url
+# is the one recorded in the manifest and every file is still there.
+def write_sitemap(manifest, public_dir, basepath, site_url, max_urls=SITEMAP_MAX_URLS, max_bytes=SITEMAP_MAX_BYTES):
+    previous = manifest.generated.get("sitemap")
+    if previous and not manifest.changed() and manifest.site_url == site_url:
+        if all(os.path.exists(os.path.join(public_dir, rel_path)) for rel_path in previous):
+            return previous
+    manifest.site_url = site_url
+    os.makedirs(public_dir, exist_ok=True)
+    writer = SitemapWriter(public_dir, max_urls, max_bytes)
+    try:
+        for dest_path in sorted(manifest.pages):
+            loc = absolute_url(site_url, page_url(dest_path, public_dir, basepath))
+            writer.add(loc, manifest.pages[dest_path].get("modified", ""))
+    finally:
+        shards = writer.close()
+
+    index_path = os.path.join(public_dir, "sitemap.xml")
+    if len(shards) == 1:
+        replace_if_changed(os.path.join(public_dir, shards[0][0]) + ".tmp", index_path)
+        return manifest.replace_generated("sitemap", ["sitemap.xml"], public_dir)
+
+    for rel_path, _ in shards:
+        path = os.path.join(public_dir, rel_path)
+        replace_if_changed(path + ".tmp", path)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(f'{XML_DECLARATION}<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n')
+        for rel_path, lastmod in shards:
+            loc = escape_text(absolute_url(site_url, basepath + rel_path))
+            lastmod_tag = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+            f.write(f"<sitemap><loc>{loc}</loc>{lastmod_tag}</sitemap>\n")
+        f.write("</sitemapindex>\n")
+    replace_if_changed(index_path + ".tmp", index_path)
+    return manifest.replace_generated("sitemap", ["sitemap.xml"] + [rel_path for rel_path, _ in shards], public_dir)
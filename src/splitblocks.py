@@ -1,9 +1,77 @@
+import re
+
+BLANK_LINES_PATTERN = re.compile(r"\n\s*\n")
+
+
+# One regex split on blank lines is much faster than walking the lines, and
+# gives the same blocks unless a fenced code block contains a blank line.
+# Only those documents take the line walk.
 def markdown_to_blocks(markdown):
+    if fence_has_blank_line(markdown):
+        return list(iter_blocks(markdown.split("\n")))
     blocks = []
-    split_md = markdown.split("\n\n")
-    for sentence in split_md:
-        if sentence == "": 
-            continue 
-        blocks.append(sentence.strip())
-    return blocks 
+    for chunk in BLANK_LINES_PATTERN.split(markdown):
+        chunk = chunk.strip()
+        if chunk:
+            blocks.append(chunk)
+    return blocks
+
+
+def is_fence(line):
+    stripped = line.strip()
+    return stripped.startswith("```") and stripped.count("```") == 1
+
+
+def find_fences(markdown):
+    fences = []
+    start = markdown.find("```")
+    while start != -1:
+        line_start = markdown.rfind("\n", 0, start) + 1
+        end = markdown.find("\n", start)
+        if end == -1:
+            end = len(markdown)
+        if is_fence(markdown[line_start:end]):
+            fences.append((line_start, end))
+        start = markdown.find("```", end)
+    return fences
+
+
+def fence_has_blank_line(markdown):
+    opening = None
+    for start, end in find_fences(markdown):
+        if opening is None:
+            opening = end
+            continue
+        if BLANK_LINES_PATTERN.search(markdown, opening, start):
+            return True
+        opening = None
+    return opening is not None and BLANK_LINES_PATTERN.search(markdown, opening) is not None
+
+
+# Reads blocks from any iterable of lines, e.g. an open file, so a document
+# never has to be held in memory whole. Blank lines separate blocks except
+# inside a ``` fence, where they belong to the code.
+def iter_blocks(lines):
+    for _, block in iter_numbered_blocks(lines):
+        yield block
+
 
+# Same blocks as iter_blocks, each with the 1-based line it starts on.
+def iter_numbered_blocks(lines):
+    block = []
+    start = 0
+    fenced = False
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if is_fence(line):
+            fenced = not fenced
+        elif not fenced and line.strip() == "":
+            if block:
+                yield start, "\n".join(block).strip()
+                block = []
+            continue
+        if not block:
+            start = number
+        block.append(line)
+    if block:
+        yield start, "\n".join(block).strip()
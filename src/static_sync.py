@@ -0,0 +1,149 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from fingerprint import file_fingerprint, fingerprinted_path
+from manifest import hash_file, remove_empty_dirs
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request to clone a file's extents (btrfs, xfs, ...), see ioctl_ficlone(2).
+FICLONE = 0x40049409
+
+LINK_MODES = ("copy", "hard", "reflink")
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied = 0
+        self.skipped = 0
+        self.removed = 0
+        self.bytes_copied = 0
+        self.bytes_skipped = 0
+
+    def __repr__(self):
+        return (
+            f"copied {self.copied} files ({format_bytes(self.bytes_copied)}), "
+            f"skipped {self.skipped} ({format_bytes(self.bytes_skipped)}), "
+            f"removed {self.removed}"
+        )
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def list_files(root):
+    files = []
+    for dir_path, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dir_path, name)
+            files.append(os.path.relpath(path, root))
+    return files
+
+
+def is_up_to_date(src_path, dest_path, checksum):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src_path)
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if checksum and hash_file(src_path) == hash_file(dest_path):
+        os.utime(dest_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        return True
+    return False
+
+
+def place_file(src_path, dest_path, link="copy"):
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if link == "hard":
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError:
+            pass
+    elif link == "reflink" and fcntl is not None:
+        try:
+            with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+                fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+            shutil.copystat(src_path, dest_path)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src_path, dest_path)
+
+
+# With fingerprint=True the file is published as name.<hash>.ext, and the
+# record keeps the hash and that output path; previous is the file's record
+# from the last build, whose hash is reused while the file is unchanged.
+def sync_file(src_dir, dest_dir, rel_path, checksum=False, link="copy", previous=None, fingerprint=False):
+    src_path = os.path.join(src_dir, rel_path)
+    stat = os.stat(src_path)
+    record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    output = rel_path
+    if fingerprint:
+        record["hash"] = file_fingerprint(src_path, record, previous)
+        record["output"] = output = fingerprinted_path(rel_path, record["hash"])
+    dest_path = os.path.join(dest_dir, output)
+    if is_up_to_date(src_path, dest_path, checksum):
+        return False, record
+    place_file(src_path, dest_path, link)
+    return True, record
+
+
+def synced_output(rel_path, record):
+    return record.get("output", rel_path)
+
+
+def remove_synced_file(dest_dir, rel_path):
+    dest_path = os.path.normpath(os.path.join(dest_dir, rel_path))
+    if not os.path.exists(dest_path):
+        return False
+    os.remove(dest_path)
+    remove_empty_dirs(os.path.dirname(dest_path), dest_dir)
+    return True
+
+
+# Mirrors src_dir into dest_dir without touching anything else there (the
+# rendered pages live in the same tree). previous maps the files synced last
+# time to their records, so outputs that are no longer produced (the file
+# disappeared from src_dir or its fingerprint changed) can be removed; the
+# returned mapping is meant to be passed in on the next run.
+def sync_static(src_dir, dest_dir, previous=None, checksum=False, link="copy", threads=8, fingerprint=False):
+    stats = SyncStats()
+    previous = previous or {}
+    files = list_files(src_dir)
+    os.makedirs(dest_dir, exist_ok=True)
+    assets = {}
+
+    def sync(rel_path):
+        return sync_file(src_dir, dest_dir, rel_path, checksum, link, previous.get(rel_path), fingerprint)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = executor.map(sync, files)
+        for rel_path, (copied, record) in zip(files, results):
+            assets[rel_path] = record
+            if copied:
+                stats.copied += 1
+                stats.bytes_copied += record["size"]
+            else:
+                stats.skipped += 1
+                stats.bytes_skipped += record["size"]
+
+    outputs = {synced_output(rel_path, record) for rel_path, record in assets.items()}
+    for rel_path, record in previous.items():
+        output = synced_output(rel_path, record)
+        if output not in outputs and remove_synced_file(dest_dir, output):
+            stats.removed += 1
+    return stats, assets
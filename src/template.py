@@ -0,0 +1,192 @@
+import html
+import os
+import re
+from functools import lru_cache
+from htmlnode import escape_attribute
+from manifest import hash_text
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+URL_PATTERN = re.compile(r'((?:href|src)=")(/[^"]*)"')
+
+
+# Cached so that every page rendered for one basepath shares the same
+# rewriter, which is also the key Template.bind caches on. asset_urls, when
+# given, maps static file urls to their fingerprinted copies (see
+# fingerprint.AssetUrls) in the same pass.
+@lru_cache(maxsize=64)
+def basepath_rewriter(basepath, asset_urls=None):
+    if asset_urls is not None:
+        def rewrite_url(url):
+            if url.startswith("/"):
+                return basepath + asset_urls.get(url)[1:]
+            return url
+
+        return rewrite_url
+
+    if basepath == "/":
+        return None
+
+    def rewrite_url(url):
+        if url.startswith("/"):
+            return basepath + url[1:]
+        return url
+
+    return rewrite_url
+
+
+# Stands in for the basepath rewriter when one render serves several
+# basepaths: root-relative urls become marked slots, and join_url_slots()
+# fills them in for each target. The markers are control characters that
+# are not valid in HTML text, so real content does not contain them.
+URL_SLOT_START = "\x00"
+URL_SLOT_END = "\x01"
+URL_SLOT_PATTERN = re.compile(f"{URL_SLOT_START}([^{URL_SLOT_END}]*){URL_SLOT_END}")
+
+
+def url_slot(url):
+    if url.startswith("/"):
+        return f"{URL_SLOT_START}{url[1:]}{URL_SLOT_END}"
+    return url
+
+
+@lru_cache(maxsize=64)
+def slot_rewriter(asset_urls=None):
+    if asset_urls is None:
+        return url_slot
+
+    def rewrite_url(url):
+        return url_slot(asset_urls.get(url))
+
+    return rewrite_url
+
+
+# Returns the literal text and the slotted urls of a page rendered with
+# url_slot, alternating and starting with text.
+def split_url_slots(html):
+    return URL_SLOT_PATTERN.split(html)
+
+
+# Slotted urls were escaped as attribute values, so the basepath is
+# escaped the same way, once, to match a page rendered for it directly.
+def join_url_slots(parts, basepath):
+    basepath = escape_attribute(basepath)
+    joined = list(parts)
+    joined[1::2] = [basepath + url for url in parts[1::2]]
+    return "".join(joined)
+
+
+def compile_segments(text):
+    segments = []
+    pos = 0
+    for match in SLOT_PATTERN.finditer(text):
+        compile_literal(text[pos : match.start()], segments)
+        segments.append(("slot", match.group(1), match.group(0)))
+        pos = match.end()
+    compile_literal(text[pos:], segments)
+    return segments
+
+
+def compile_literal(text, segments):
+    pos = 0
+    for match in URL_PATTERN.finditer(text):
+        segments.append(("literal", text[pos : match.end(1)], None))
+        segments.append(("url", html.unescape(match.group(2)), match.group(2)))
+        segments.append(("literal", '"', None))
+        pos = match.end()
+    segments.append(("literal", text[pos:], None))
+
+
+class Template:
+    def __init__(self, text, path=None):
+        self.path = path
+        self.hash = hash_text(text)
+        self.segments = compile_segments(text)
+        self.urls = [value for kind, value, _ in self.segments if kind == "url"]
+        self.bound = {}
+
+    # Bound parts are keyed by rewriter functions, which cannot be pickled
+    # for worker processes; they are cheap to rebuild on the other side.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["bound"] = {}
+        return state
+
+    # Resolves the url segments for one basepath and merges the literals
+    # around them, leaving an alternating list of literal strings and slots.
+    # Url segments hold the unescaped url; a rewritten one is escaped again
+    # like any attribute value, an untouched one is kept as written.
+    def bind(self, rewrite_url=None):
+        parts = self.bound.get(rewrite_url)
+        if parts is not None:
+            return parts
+        parts = []
+        literal = ""
+        for kind, value, raw in self.segments:
+            if kind == "slot":
+                parts.append((False, literal))
+                parts.append((True, (value, raw)))
+                literal = ""
+            elif kind == "url" and rewrite_url is not None:
+                literal += escape_attribute(rewrite_url(value))
+            elif kind == "url":
+                literal += raw
+            else:
+                literal += value
+        parts.append((False, literal))
+        self.bound[rewrite_url] = parts
+        return parts
+
+    def render(self, slots, rewrite_url=None):
+        html = []
+        for is_slot, value in self.bind(rewrite_url):
+            if is_slot:
+                name, raw = value
+                html.append(slots.get(name, raw))
+            else:
+                html.append(value)
+        return "".join(html)
+
+    # Like render, but slot values that are HTML nodes are streamed straight
+    # into write() instead of being serialized to one string first.
+    def stream(self, write, slots, rewrite_url=None):
+        for is_slot, value in self.bind(rewrite_url):
+            if not is_slot:
+                write(value)
+                continue
+            name, raw = value
+            slot = slots.get(name, raw)
+            if isinstance(slot, str):
+                write(slot)
+            else:
+                slot.emit_html(write, rewrite_url)
+
+
+class TemplateCache:
+    def __init__(self):
+        self.templates = {}
+
+    def load(self, path):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.templates.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(path) as f:
+            template = Template(f.read(), path)
+        self.templates[path] = (key, template)
+        return template
+
+
+def select_template(from_path, dir_path_content, template_path, templates=None):
+    if not templates:
+        return template_path
+    rel_path = os.path.relpath(from_path, dir_path_content).replace(os.sep, "/")
+    best = None
+    for prefix in templates:
+        normalized = prefix.strip("/")
+        if rel_path == normalized or rel_path.startswith(normalized + "/"):
+            if best is None or len(normalized) > len(best.strip("/")):
+                best = prefix
+    if best is None:
+        return template_path
+    return templates[best]
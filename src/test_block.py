@@ -1,7 +1,27 @@
+import random
 import unittest
-from block import BlockType, block_to_block_type, markdown_to_html_node
+from block import BlockType, block_to_block_type, classify_block, is_fence_opening, markdown_to_html_node
 from htmlnode import HTMLNode
 
+# The line-by-line classifier classify_block replaced, with code fences
+# allowed a language name since highlighting was added.
+def reference_block_type(block):
+    lines = block.split("\n")
+    if len(lines) >= 2 and is_fence_opening(lines[0]) and lines[-1] == "```":
+        return BlockType.CODE
+    if all(line.startswith(">") for line in lines):
+        return BlockType.QUOTE
+    if all(line.startswith("- ") for line in lines):
+        return BlockType.UNORDERED_LIST
+    if all(line.startswith(f"{number}. ") for number, line in enumerate(lines, 1)):
+        return BlockType.ORDERED_LIST
+    first_line = lines[0]
+    count = len(first_line) - len(first_line.lstrip("#"))
+    if len(first_line) > count and 1 <= count <= 6 and first_line[count] == " ":
+        return BlockType.HEADING
+    return BlockType.PARAGRAPH
+
+
 class test_block_to_block_type(unittest.TestCase):
     def test_block_to_block_type(self):
         block = "```\nprint('hi')\n```"
@@ -32,6 +52,32 @@ class test_block_to_block_type(unittest.TestCase):
         block_type = block_to_block_type(block)
         self.assertEqual(block_type, BlockType.PARAGRAPH)
 
+    def test_classify_block(self):
+        block = "\n".join(f"{i}. Item" for i in range(1, 13))
+        self.assertEqual(classify_block(block), (BlockType.ORDERED_LIST, block.split("\n")))
+        self.assertEqual(classify_block("1. Item\n3. Item")[0], BlockType.PARAGRAPH)
+        self.assertEqual(classify_block("> Quote\nnot quoted")[0], BlockType.PARAGRAPH)
+        self.assertEqual(classify_block("####### Seven")[0], BlockType.PARAGRAPH)
+        self.assertEqual(classify_block("#Heading")[0], BlockType.PARAGRAPH)
+        self.assertEqual(classify_block("```\ncode")[0], BlockType.PARAGRAPH)
+
+    def test_classify_block_matches_reference(self):
+        rng = random.Random(13)
+        prefixes = [
+            "", "#", "# ", "###### ", "####### ", "#x", ">", "> ", ">>", "- ", "-", "-- ", "1. ", "2. ", "3. ",
+            "1.", "10. ", "0. ", "```", "```python", "```c++", "``` x", "`", "text ", " ",
+        ]
+        for _ in range(5000):
+            lines = []
+            for number in range(1, rng.randint(1, 5) + 1):
+                prefix = rng.choice(prefixes + [f"{number}. "] * 3)
+                lines.append(prefix + rng.choice(["", "item", "#", "> x", "```", "- y"]))
+            if rng.random() < 0.2:
+                lines.append("```")
+            block = "\n".join(lines)
+            with self.subTest(block=block):
+                self.assertEqual(classify_block(block), (reference_block_type(block), block.split("\n")))
+
 
 
     def test_markdown_to_html_node(self):
@@ -70,4 +116,11 @@ the **same** even with inline stuff
         self.assertEqual(
         html,
         "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
-    )
\ No newline at end of file
+    )
+
+    def test_codeblock_is_escaped_once(self):
+        md = "```\nif a < b && c:\n```\n\nR&D `<br>`"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>if a &lt; b &amp;&amp; c:\n</code></pre><p>R&amp;D <code>&lt;br&gt;</code></p></div>",
+        )
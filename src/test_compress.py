@@ -0,0 +1,58 @@
+import gzip
+import os
+import tempfile
+import unittest
+from compress import Compressor
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class TestCompressor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write(os.path.join(self.root, "index.html"), b"<p>hello</p>" * 200)
+        write(os.path.join(self.root, "small.css"), b"p{}")
+        write(os.path.join(self.root, "random.js"), os.urandom(4096))
+        write(os.path.join(self.root, "image.png"), b"\0" * 4096)
+        self.files = ["index.html", "small.css", "random.js", "image.png"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def test_thresholds(self):
+        stats, records = Compressor().run(self.root, self.files)
+        self.assertEqual((stats.compressed, stats.incompressible), (1, 2))
+        with gzip.open(self.path("index.html.gz")) as f:
+            self.assertEqual(f.read(), b"<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(self.path("small.css.gz")))
+        self.assertFalse(os.path.exists(self.path("random.js.gz")))
+        self.assertNotIn("image.png", records)
+
+    def test_skips_unchanged_and_removes_stale(self):
+        compressor = Compressor()
+        _, records = compressor.run(self.root, self.files)
+        stats, records = compressor.run(self.root, self.files, records)
+        self.assertEqual((stats.compressed, stats.skipped), (0, 3))
+
+        write(self.path("index.html"), b"<p>changed</p>" * 200)
+        stats, records = compressor.run(self.root, self.files, records)
+        self.assertEqual((stats.compressed, stats.skipped), (1, 2))
+        with gzip.open(self.path("index.html.gz")) as f:
+            self.assertEqual(f.read(), b"<p>changed</p>" * 200)
+
+        os.remove(self.path("index.html"))
+        stats, records = compressor.run(self.root, ["small.css", "random.js"], records)
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from corpus import CorpusOptions, generate_site
+from generate_page import generate_pages_recursive
+
+
+def read_tree(root):
+    tree = {}
+    for dir_path, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dir_path, name)
+            with open(path) as f:
+                tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic_and_renderable(self):
+        options = CorpusOptions(pages=12, blocks=20, nesting=2, seed=7)
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            content, template = generate_site(first, options)
+            generate_site(second, options)
+            self.assertEqual(read_tree(first), read_tree(second))
+            self.assertEqual(len(read_tree(content)), 12)
+
+            public = os.path.join(first, "public")
+            generate_pages_recursive(content, template, public, "/")
+            self.assertEqual(len(read_tree(public)), 12)
+
+    def test_seed_changes_content(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            generate_site(first, CorpusOptions(pages=3, seed=1))
+            generate_site(second, CorpusOptions(pages=3, seed=2))
+            self.assertNotEqual(read_tree(first), read_tree(second))
+
+
+if __name__ == "__main__":
+    unittest.main()
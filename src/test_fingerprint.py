@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+from fingerprint import AssetUrls, file_fingerprint, fingerprinted_path, write_asset_manifest
+from manifest import BuildManifest
+from template import Template, basepath_rewriter, join_url_slots, slot_rewriter, split_url_slots
+
+ASSETS = {
+    "index.css": {"size": 7, "mtime_ns": 1, "hash": "0123456789ab", "output": "index.0123456789ab.css"},
+    os.path.join("images", "a.png"): {
+        "size": 9, "mtime_ns": 1, "hash": "ba9876543210", "output": os.path.join("images", "a.ba9876543210.png"),
+    },
+}
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("images/a.png", "0123456789abcdef"), "images/a.0123456789ab.png")
+        self.assertEqual(fingerprinted_path("CNAME", "0123456789abcdef"), "CNAME.0123456789ab")
+
+    def test_unchanged_file_is_not_hashed(self):
+        record = {"size": 7, "mtime_ns": 1}
+        self.assertEqual(file_fingerprint("missing.css", record, ASSETS["index.css"]), "0123456789ab")
+        with self.assertRaises(OSError):
+            file_fingerprint("missing.css", {"size": 8, "mtime_ns": 1}, ASSETS["index.css"])
+
+    def test_rewrites_with_basepath(self):
+        urls = AssetUrls(ASSETS)
+        rewrite_url = basepath_rewriter("/site/", urls)
+        self.assertEqual(rewrite_url("/index.css?v=1"), "/site/index.0123456789ab.css?v=1")
+        self.assertEqual(rewrite_url("/images/a.png#top"), "/site/images/a.ba9876543210.png#top")
+        self.assertEqual(rewrite_url("/blog/"), "/site/blog/")
+        self.assertEqual(rewrite_url("https://example.com/index.css"), "https://example.com/index.css")
+        self.assertEqual(basepath_rewriter("/", urls)("/index.css"), "/index.0123456789ab.css")
+
+        template = Template('<link href="/index.css" /><img src="/images/a.png">{{ Content }}')
+        parts = split_url_slots(template.render({"Content": ""}, slot_rewriter(urls)))
+        self.assertEqual(
+            join_url_slots(parts, "/docs/"),
+            '<link href="/docs/index.0123456789ab.css" /><img src="/docs/images/a.ba9876543210.png">',
+        )
+
+    def test_write_asset_manifest(self):
+        with tempfile.TemporaryDirectory() as public:
+            manifest = BuildManifest("unused.json", 1)
+            manifest.assets = ASSETS
+            self.assertEqual(write_asset_manifest(manifest, public, True), ["asset-manifest.json"])
+            with open(os.path.join(public, "asset-manifest.json")) as f:
+                self.assertEqual(json.load(f)["images/a.png"], "images/a.ba9876543210.png")
+            self.assertEqual(write_asset_manifest(manifest, public, False), [])
+            self.assertEqual(os.listdir(public), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
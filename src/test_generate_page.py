@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest 
-from generate_page import extract_title
+import generate_page
+from generate_page import Target, extract_title, generate_pages_recursive
+from manifest import BuildManifest
 
 class TestExtractTitle(unittest.TestCase):
     def test_extract_title(self):
@@ -9,4 +13,118 @@ With some contents
 And even more contents 
 """
         heading = extract_title(md)
-        self.assertEqual("Document", heading)
\ No newline at end of file
+        self.assertEqual("Document", heading)
+
+class TestGeneratePagesParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        for i in range(6):
+            page_dir = os.path.join(self.content, f"post{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), "w") as f:
+                f.write(f"# Post {i}\n\nSome **bold** text and a [link](/post{i + 1})")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, root):
+        tree = {}
+        for dir_path, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(dir_path, name)
+                with open(path, "rb") as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        generate_pages_recursive(self.content, self.template, parallel, "/site/", jobs=3)
+        self.assertEqual(len(self.read_tree(serial)), 6)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_targets_match_single_builds(self):
+        outputs = {basepath: os.path.join(self.root, f"single{i}") for i, basepath in enumerate(("/", "/site/", "/x&y/"))}
+        for basepath, dest in outputs.items():
+            generate_pages_recursive(self.content, self.template, dest, basepath)
+        multi = os.path.join(self.root, "multi")
+        targets = [Target("/site/", os.path.join(self.root, "site")), Target("/x&y/", os.path.join(self.root, "x"))]
+        generate_pages_recursive(self.content, self.template, multi, "/", jobs=2, targets=targets)
+        self.assertEqual(self.read_tree(multi), self.read_tree(outputs["/"]))
+        for target in targets:
+            self.assertEqual(self.read_tree(target.public_dir), self.read_tree(outputs[target.basepath]))
+
+    def test_targets_only_write_stale_outputs(self):
+        manifest = BuildManifest(os.path.join(self.root, "m.json"), 1)
+        target = Target("/site/", os.path.join(self.root, "site"), BuildManifest(os.path.join(self.root, "t.json"), 1))
+        dest = os.path.join(self.root, "public")
+        generate_pages_recursive(self.content, self.template, dest, "/", manifest, targets=[target])
+        os.remove(os.path.join(target.public_dir, "post2", "index.html"))
+        manifest.rendered = target.manifest.rendered = 0
+        generate_pages_recursive(self.content, self.template, dest, "/", manifest, targets=[target])
+        self.assertEqual((manifest.rendered, target.manifest.rendered), (0, 1))
+        self.assertIn(b'href="/site/post3"', self.read_tree(target.public_dir)[os.path.join("post2", "index.html")])
+
+    def test_error_names_failing_file(self):
+        bad_path = os.path.join(self.content, "post3", "index.md")
+        with open(bad_path, "w") as f:
+            f.write("# Broken\n\nThis **never closes")
+        dest = os.path.join(self.root, "public")
+        for jobs in (1, 2):
+            with self.assertRaises(ValueError) as cm:
+                generate_pages_recursive(self.content, self.template, dest, "/", jobs=jobs)
+            self.assertIn(bad_path, str(cm.exception))
+
+    def test_missing_front_matter_template_names_page(self):
+        page = os.path.join(self.content, "post1", "index.md")
+        with open(page, "w") as f:
+            f.write("---\ntemplate: missing.html\n---\n# Post")
+        with self.assertRaises(ValueError) as cm:
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "public"), "/")
+        self.assertEqual(str(cm.exception), f"{page}: template missing.html does not exist")
+
+    def test_streamed_output_matches_in_memory(self):
+        with open(os.path.join(self.content, "post2", "index.md"), "w") as f:
+            f.write("Intro with a [link](/a)\n\n# Streamed\n\n```\ncode\n\nmore code\n```\n\n- one\n- two\n")
+        in_memory = os.path.join(self.root, "in_memory")
+        streamed = os.path.join(self.root, "streamed")
+        manifests = [BuildManifest(os.path.join(self.root, name), 1) for name in ("in_memory.json", "streamed.json")]
+        generate_pages_recursive(self.content, self.template, in_memory, "/site/", manifests[0])
+        threshold = generate_page.STREAM_THRESHOLD
+        generate_page.STREAM_THRESHOLD = 0
+        try:
+            generate_pages_recursive(self.content, self.template, streamed, "/site/", manifests[1])
+        finally:
+            generate_page.STREAM_THRESHOLD = threshold
+        tree = self.read_tree(streamed)
+        self.assertIn(b"<title>Streamed</title>", tree[os.path.join("post2", "index.html")])
+        self.assertIn(b"<pre><code>code\n\nmore code\n</code></pre>", tree[os.path.join("post2", "index.html")])
+        self.assertEqual(tree, self.read_tree(in_memory))
+        post = [os.path.join(root, "post2", "index.html") for root in (in_memory, streamed)]
+        links = [list(manifest.page_links(dest_path)) for manifest, dest_path in zip(manifests, post)]
+        self.assertEqual(links[0], [["/a", 1]])
+        self.assertEqual(links[1], links[0])
+        self.assertNotIn("links", manifests[1].pages[post[1]])
+
+    def test_unchanged_streamed_page_keeps_mtime(self):
+        page = os.path.join(self.content, "post2", "index.md")
+        with open(page, "w") as f:
+            f.write("# Large\n\n" + "".join(f"Paragraph {i} with a [link](/post{i})\n\n" for i in range(5000)))
+        dest = os.path.join(self.root, "public")
+        dest_path = os.path.join(dest, "post2", "index.html")
+        threshold = generate_page.STREAM_THRESHOLD
+        generate_page.STREAM_THRESHOLD = 0
+        try:
+            generate_pages_recursive(self.content, self.template, dest, "/")
+            os.utime(dest_path, ns=(1, 1))
+            generate_pages_recursive(self.content, self.template, dest, "/")
+        finally:
+            generate_page.STREAM_THRESHOLD = threshold
+        self.assertEqual(os.stat(dest_path).st_mtime_ns, 1)
+        self.assertEqual(os.listdir(os.path.dirname(dest_path)), ["index.html"])
@@ -0,0 +1,41 @@
+import unittest
+from block import code_to_html_node, classify_block, BlockType
+from highlight import highlight
+
+
+class TestHighlight(unittest.TestCase):
+    def test_python(self):
+        html = highlight('def f(x):  # a < b\n    return "ok" + 42\n', "python")
+        self.assertEqual(
+            html,
+            '<span class="tok-keyword">def</span> f(x):  <span class="tok-comment"># a &lt; b</span>\n'
+            '    <span class="tok-keyword">return</span> <span class="tok-string">"ok"</span>'
+            ' + <span class="tok-number">42</span>\n',
+        )
+
+    def test_language_aliases(self):
+        self.assertEqual(highlight("true", "JSON"), '<span class="tok-keyword">true</span>')
+        self.assertEqual(highlight("echo $HOME", "sh"), highlight("echo $HOME", "bash"))
+        self.assertIn('<span class="tok-comment">// x</span>', highlight("let a = 1; // x", "js"))
+        self.assertIsNone(highlight("x", "cobol"))
+
+    def test_code_block(self):
+        block = '```python\nx = "<b>"\n```'
+        block_type, lines = classify_block(block)
+        self.assertEqual(block_type, BlockType.CODE)
+        self.assertEqual(
+            code_to_html_node(block, lines).to_html(),
+            '<pre><code class="language-python">x = <span class="tok-string">"&lt;b&gt;"</span>\n</code></pre>',
+        )
+
+    def test_unknown_language_is_plain(self):
+        block = "```cobol\nDISPLAY 'HI'.\n```"
+        self.assertEqual(
+            code_to_html_node(block, classify_block(block)[1]).to_html(),
+            "<pre><code>DISPLAY 'HI'.\n</code></pre>",
+        )
+        self.assertEqual(classify_block("```not a fence\nx\n```")[0], BlockType.PARAGRAPH)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
+import io
+import pickle
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode
+from textnode import ImageNode
 
 class TestHTMLNode(unittest.TestCase): 
     def test_eq(self):
@@ -45,6 +48,51 @@ class TestParentNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_write_html_matches_to_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "item "), LeafNode("b", str(i))]) for i in range(1000)])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+        self.assertTrue(node.to_html().startswith("<ul><li>item <b>0</b></li><li>"))
+
+    def test_deep_nesting(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(20000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 20000 * len("<span></span>") + len("leaf"))
+
+    def test_parent_props(self):
+        node = ParentNode("code", [LeafNode(None, "x")], {"class": "language-python"})
+        self.assertEqual(node.to_html(), '<code class="language-python">x</code>')
+
+    def test_missing_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", None)]).to_html()
+
+    def test_escaping(self):
+        node = ParentNode("p", [
+            LeafNode(None, "a < b & c > d"),
+            LeafNode("a", '"quoted"', {"href": '/x?a=1&b="2"'}),
+            RawNode("<span>&amp;</span>"),
+        ])
+        self.assertEqual(
+            node.to_html(),
+            '<p>a &lt; b &amp; c &gt; d<a href="/x?a=1&amp;b=&quot;2&quot;">"quoted"</a><span>&amp;</span></p>',
+        )
+        text = "nothing to escape"
+        self.assertIs(LeafNode(None, text).to_html(), text)
+
+    def test_slots_pickle(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/x"})])
+        self.assertFalse(hasattr(node, "__dict__"))
+        children = [LeafNode("a", "link", {"href": "/x"}), RawNode("<i>x</i>"), ImageNode("/a.png", "a")]
+        node = ParentNode("p", children)
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertEqual(copy.to_html(), node.to_html())
+        self.assertEqual([type(child) for child in copy.children], [LeafNode, RawNode, ImageNode])
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+import os
+import struct
+import tempfile
+import unittest
+from image_size import ImageSizeCache, image_sizes, read_image_size
+from textnode import TextType, token_to_html_node
+
+IMAGES = {
+    "a.png": b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 640, 480) + b"\x08\x06\x00\x00\x00",
+    "b.gif": b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 20,
+    "c.jpg": (
+        b"\xff\xd8"
+        + b"\xff\xe1" + struct.pack(">H", 2 + 5000) + b"\x00" * 5000
+        + b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 300, 200) + b"\x00" * 10
+    ),
+    "d.webp": b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8 + (99).to_bytes(3, "little") + (49).to_bytes(3, "little"),
+    "e.webp": b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f" + ((9) | (19 << 14)).to_bytes(4, "little"),
+    "f.webp": b"RIFF\x00\x00\x00\x00WEBPVP8 " + b"\x00" * 7 + b"\x9d\x01\x2a" + struct.pack("<HH", 7, 5),
+    "g.png": b"not an image",
+}
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.assets = {}
+        for name, data in IMAGES.items():
+            self.write(name, data)
+
+    def tearDown(self):
+        image_sizes.entries = {}
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        stat = os.stat(path)
+        self.assets[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def test_read_image_size(self):
+        sizes = {name: read_image_size(os.path.join(self.tmp.name, name)) for name in IMAGES}
+        self.assertEqual(
+            sizes,
+            {
+                "a.png": (640, 480), "b.gif": (32, 16), "c.jpg": (200, 300), "d.webp": (100, 50),
+                "e.webp": (10, 20), "f.webp": (7, 5), "g.png": None,
+            },
+        )
+
+    def test_cache_rereads_changed_images(self):
+        cache = ImageSizeCache()
+        cache.load(os.path.join(self.tmp.name, "cache", "images.json"))
+        cache.update(self.tmp.name, self.assets)
+        self.assertEqual(cache.sniffed, len(IMAGES))
+        cache.save()
+
+        cache = ImageSizeCache()
+        cache.load(os.path.join(self.tmp.name, "cache", "images.json"))
+        self.write("b.gif", b"GIF87a" + struct.pack("<HH", 1, 2))
+        del self.assets["a.png"]
+        cache.update(self.tmp.name, self.assets)
+        self.assertEqual(cache.sniffed, 1)
+        self.assertEqual(cache.get("/b.gif"), (1, 2))
+        self.assertEqual(list(cache.get("/c.jpg")), [200, 300])
+        self.assertIsNone(cache.get("/a.png"))
+        self.assertIsNone(cache.get("c.jpg"))
+
+    def test_image_node_dimensions(self):
+        image_sizes.update(self.tmp.name, self.assets)
+        node = token_to_html_node(TextType.IMAGE, "alt", "/a.png")
+        self.assertEqual(node.to_html(), '<img src="/a.png" alt="alt" width="640" height="480">')
+        node = token_to_html_node(TextType.IMAGE, "alt", "/g.png")
+        self.assertEqual(node.to_html(), '<img src="/g.png" alt="alt">')
@@ -0,0 +1,60 @@
+import random
+import unittest
+from text_to_textnodes import text_to_textnodes, text_to_textnodes_split
+
+PIECES = [
+    "a", "b", " ", "word", "\n", "`", "**", "*", "_", "!", "[", "]", "(", ")",
+    "![img](/a.png)", "[link](/b)", "[x_y](/c_d)", "![](e)", "[](f)",
+    "`code **not bold**`", "**bold _not italic_**", "_it_", "[a **b**](c)",
+]
+
+
+def render(text, convert):
+    try:
+        return convert(text)
+    except ValueError as e:
+        return ("error", str(e))
+
+
+class TestScanInline(unittest.TestCase):
+    def assertSameAsSplit(self, text):
+        self.assertEqual(
+            render(text, text_to_textnodes),
+            render(text, text_to_textnodes_split),
+            repr(text),
+        )
+
+    def test_known_cases(self):
+        cases = [
+            "",
+            "plain",
+            "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+            "a***b**c",
+            "**a `b` c**",
+            "_a **b** c_",
+            "`` empty **** code __",
+            "![a](b)[c](d)!![e](f)",
+            "**!**[a](b)",
+            "[link](https://example.com/a_b)",
+            "unclosed `tick",
+        ]
+        for text in cases:
+            self.assertSameAsSplit(text)
+
+    def test_differential_random_corpus(self):
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 30)))
+            self.assertSameAsSplit(text)
+
+    def test_differential_valid_corpus(self):
+        rng = random.Random(99)
+        balanced = ["`x`", "**b**", "_i_", "![a](/i.png)", "[l](/p)", "text ", "! ", "[ ", ") "]
+        for _ in range(2000):
+            text = "".join(rng.choice(balanced) for _ in range(rng.randint(1, 60)))
+            nodes = text_to_textnodes(text)
+            self.assertEqual(nodes, text_to_textnodes_split(text), repr(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
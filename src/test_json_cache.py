@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from json_cache import JsonCache
+
+
+class VersionTwo(JsonCache):
+    version = 2
+    key = "things"
+
+
+class TestJsonCache(unittest.TestCase):
+    def test_round_trip_and_version(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "cache", "things.json")
+            cache = VersionTwo()
+            cache.load(path)
+            cache.entries["a"] = {"size": 1}
+            cache.save()
+            cache = VersionTwo()
+            cache.load(path)
+            self.assertEqual(cache.entries, {"a": {"size": 1}})
+            cache = JsonCache()
+            cache.load(path)
+            self.assertEqual(cache.entries, {})
+
+    def test_unchanged_save_keeps_mtime(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "things.json")
+            cache = JsonCache()
+            cache.load(path)
+            cache.entries["a"] = 1
+            cache.save()
+            os.utime(path, ns=(1, 1))
+            cache.load(path)
+            cache.save()
+            self.assertEqual(os.stat(path).st_mtime_ns, 1)
+            self.assertEqual(os.listdir(root), ["things.json"])
+
+    def test_unreadable_file_loads_empty(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "things.json")
+            for text in ("{not json", "[1, 2]"):
+                with open(path, "w") as f:
+                    f.write(text)
+                cache = JsonCache()
+                cache.load(path)
+                self.assertEqual(cache.entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
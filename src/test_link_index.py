@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from block import render_blocks
+from link_index import check_links, page_links
+from manifest import BuildManifest
+
+
+class TestLinkIndex(unittest.TestCase):
+    def test_page_links_have_source_lines(self):
+        md = "# Title\n\n[home](/)\n\n```\ncode\n\n[not a link](/x)\n```\n\n- one\n- ![image](/a.png) [b](/b)"
+        links = page_links(md, [urls for _, _, urls in render_blocks(md)])
+        self.assertEqual(links, [["/", 3], ["/a.png", 12], ["/b", 12]])
+
+    def check(self, links, basepath="/"):
+        public = "public"
+        with tempfile.TemporaryDirectory() as root:
+            manifest = BuildManifest(os.path.join(root, "manifest.json"), 1)
+            manifest.assets = {os.path.join("images", "a.png"): {}}
+            for dest in ("index.html", os.path.join("blog", "post", "index.html"), "about.html"):
+                manifest.record(os.path.join(public, dest), "content/" + dest, "", "template.html", "", basepath)
+            manifest.record(os.path.join(public, "index.html"), "content/index.md", "", "template.html", "", basepath, links)
+            return [url for _, _, url in check_links(manifest, public, basepath)]
+
+    def test_check_links(self):
+        links = [
+            ["/", 1], ["/blog/post", 2], ["/blog/post/#top", 3], ["/about", 4],
+            ["/images/a.png", 5], ["blog/post/", 6], ["https://example.com/x", 7], ["#top", 8],
+            ["/blog/missing", 9], ["/images/b.png", 10], ["../outside", 11], ["/about/", 12],
+        ]
+        self.assertEqual(self.check(links), ["/blog/missing", "/images/b.png", "../outside", "/about/"])
+
+    def test_check_links_with_basepath(self):
+        links = [["/blog/post", 1], ["/site/blog/post", 2]]
+        self.assertEqual(self.check(links, "/site/"), ["/site/blog/post"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import main
+from block import block_cache, highlight_cache
+from compress import Compressor
+from fingerprint import fingerprints
+from generate_page import RENDERER_VERSION
+from image_size import image_sizes
+from metadata import metadata_index
+
+SOURCES = {
+    "index.md": "# Home\n\nSee the [post](/blog/post)",
+    "blog/post.md": "# Post\n\n```python\n# note\nx = 1\n```",
+    "blog/other.md": "# Other\n\nText",
+}
+
+
+# Builds a small site in a temporary directory, which main's relative
+# paths resolve against.
+class SiteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        for rel_path, text in SOURCES.items():
+            self.write(os.path.join("content", rel_path), text)
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.write("template.html", '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+        for cache in (block_cache, highlight_cache):
+            cache.clear()
+            cache.close()
+            cache.path = None
+            cache.stored = {}
+            cache.used = set()
+            cache.fresh = {}
+            cache.pickled = {}
+        for index in (metadata_index, image_sizes):
+            index.entries = {}
+            index.path = None
+        fingerprints.urls = None
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self, options=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main.build(options or main.BuildOptions())
+
+    # Every output's mtime is set back, so a later write shows up.
+    def age_outputs(self, root="docs"):
+        for dir_path, _, files in os.walk(root):
+            for name in files:
+                os.utime(os.path.join(dir_path, name), ns=(1, 1))
+
+    def rewritten(self, root="docs"):
+        paths = []
+        for dir_path, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(dir_path, name)
+                if os.stat(path).st_mtime_ns != 1:
+                    paths.append(os.path.relpath(path, root))
+        return sorted(paths)
+
+
+class TestHighlighterVersion(SiteTestCase):
+    def test_bump_rehighlights_cached_page(self):
+        self.build()
+        post = os.path.join("docs", "blog", "post.html")
+        self.assertIn('<span class="tok-comment">', self.read(post))
+
+        with mock.patch("block.highlight_block", lambda key: "new markup"):
+            self.build()
+            self.assertIn('<span class="tok-comment">', self.read(post))
+            with mock.patch.multiple(main, OUTPUT_VERSION=f"{RENDERER_VERSION}.2", HIGHLIGHTER_VERSION=2):
+                manifest = self.build()
+        self.assertIn("new markup", self.read(post))
+        self.assertEqual(manifest.rendered, len(SOURCES))
+
+
+# Paths as the watcher reports them: under main's relative directories.
+def content_path(*parts):
+    return os.path.join(main.dir_path_content, *parts)
+
+
+class TestRebuildChanged(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.options = main.BuildOptions()
+        self.manifest = self.build(self.options)
+        self.age_outputs()
+
+    def rebuild(self, changed, removed=()):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main.rebuild_changed(changed, list(removed), self.options, self.manifest)
+
+    def test_content_edit_renders_only_that_page(self):
+        self.write(os.path.join("content", "blog", "other.md"), "# Other\n\nEdited")
+        summary = self.rebuild([content_path("blog", "other.md")])
+        self.assertTrue(summary.startswith("1 page(s)"), summary)
+        self.assertIn("Edited", self.read(os.path.join("docs", "blog", "other.html")))
+        self.assertNotIn(os.path.join("blog", "post.html"), self.rewritten())
+        self.assertNotIn("index.html", self.rewritten())
+
+    def test_template_edit_renders_every_page(self):
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        summary = self.rebuild([main.template_path])
+        self.assertTrue(summary.startswith(f"{len(SOURCES)} page(s)"), summary)
+        self.assertIn("<h1>Post</h1>", self.read(os.path.join("docs", "blog", "post.html")))
+
+    def test_static_edit_syncs_without_rendering(self):
+        self.write(os.path.join("static", "index.css"), "body { margin: 0 }")
+        summary = self.rebuild([os.path.join(main.dir_path_static, "index.css")])
+        self.assertEqual(summary, "0 page(s), removed 0, 1 static file(s)")
+        self.assertEqual(self.read(os.path.join("docs", "index.css")), "body { margin: 0 }")
+        self.assertEqual(self.rewritten(), ["index.css"])
+
+    def test_deleted_page_is_removed(self):
+        os.remove(os.path.join("content", "blog", "other.md"))
+        summary = self.rebuild([], [content_path("blog", "other.md")])
+        self.assertTrue(summary.startswith("0 page(s), removed 1"), summary)
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog", "other.html")))
+        self.assertNotIn(os.path.join("docs", "blog", "other.html"), self.manifest.pages)
+
+    def test_serve_site_rebuilds_on_change(self):
+        def watch(paths, on_change):
+            self.assertIn(os.path.normpath(main.template_path), paths)
+            self.write(os.path.join("content", "index.md"), "# Home\n\nServed")
+            on_change([content_path("index.md")], [])
+
+        with mock.patch.object(main, "start_server") as start_server, mock.patch.object(main, "watch", watch):
+            with contextlib.redirect_stdout(io.StringIO()):
+                main.serve_site(self.options, 8000, True)
+        start_server.return_value.shutdown.assert_called_once()
+        self.assertIn("Served", self.read(os.path.join("docs", "index.html")))
+
+
+class TestExplain(SiteTestCase):
+    def test_explain_reports_each_page(self):
+        self.build()
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\nEdited")
+        manifest = self.build()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main.explain(manifest, [content_path("blog", "post.md"), content_path("index.md"), "notes.txt"])
+        self.assertEqual(out.getvalue().splitlines(), [
+            f"{content_path('blog', 'post.md')}: rebuilt, source {os.path.join('content', 'blog', 'post.md')} changed",
+            f"{content_path('index.md')}: up to date, skipped",
+            "notes.txt: not a page of this build",
+        ])
+
+
+class TestTargets(SiteTestCase):
+    def test_target_manifest_paths_differ(self):
+        paths = {main.target_manifest_path(public_dir) for public_dir in ("a/b", "a_b", "a/b/")}
+        self.assertEqual(len(paths), 2)
+        self.assertTrue(main.target_manifest_path("public/site").startswith("./.build_manifest.public_site."))
+
+    def test_targets_share_one_render(self):
+        options = main.BuildOptions(targets=[("/site/", "public")])
+        self.build(options)
+        self.assertIn('href="/index.css"', self.read(os.path.join("docs", "index.html")))
+        self.assertIn('href="/site/index.css"', self.read(os.path.join("public", "index.html")))
+        self.assertIn('href="/site/blog/post"', self.read(os.path.join("public", "index.html")))
+        self.assertTrue(os.path.exists(main.target_manifest_path("public")))
+
+        self.age_outputs("public")
+        self.write(os.path.join("content", "blog", "other.md"), "# Other\n\nEdited")
+        manifest = self.build(options)
+        self.assertEqual(manifest.rendered, 1)
+        pages = [path for path in self.rewritten("public") if path.endswith(".html")]
+        self.assertEqual(pages, [os.path.join("blog", "other.html")])
+
+
+class TestCompressOutputs(SiteTestCase):
+    def test_sidecars_follow_the_compressor(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\n" + "Compressible text. " * 200)
+        manifest = self.build(main.BuildOptions(compressor=Compressor(min_size=1024)))
+        self.assertTrue(os.path.exists(os.path.join("docs", "index.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog", "other.html.gz")))
+        self.assertIn("index.html", manifest.compressed)
+
+        manifest = self.build()
+        self.assertFalse(os.path.exists(os.path.join("docs", "index.html.gz")))
+        self.assertEqual(manifest.compressed, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
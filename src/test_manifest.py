@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from generate_page import generate_pages_recursive
+from manifest import BuildManifest
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nWorld")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest.load(self.manifest_path, 1)
+        if manifest.needs_full_rebuild():
+            manifest.reset()
+        generate_pages_recursive(self.content, self.template, self.public, basepath, manifest)
+        manifest.remove_orphans(self.public)
+        manifest.save()
+        return manifest
+
+    def test_rebuild_only_stale_pages(self):
+        manifest = self.build()
+        self.assertEqual((manifest.rendered, manifest.skipped), (2, 0))
+
+        manifest = self.build()
+        self.assertEqual((manifest.rendered, manifest.skipped), (0, 2))
+
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello again")
+        manifest = self.build()
+        self.assertEqual((manifest.rendered, manifest.skipped), (1, 1))
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Hello again", f.read())
+
+    def test_unchanged_manifest_is_not_rewritten(self):
+        self.build()
+        os.utime(self.manifest_path, ns=(0, 0))
+        self.build()
+        self.assertEqual(os.stat(self.manifest_path).st_mtime_ns, 0)
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello again")
+        self.build()
+        self.assertNotEqual(os.stat(self.manifest_path).st_mtime_ns, 0)
+
+    def test_basepath_change_rebuilds(self):
+        self.build()
+        manifest = self.build("/static_site/")
+        self.assertEqual((manifest.rendered, manifest.skipped), (2, 0))
+
+    def test_template_change_rebuilds_pages_using_it(self):
+        self.build()
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest = self.build()
+        self.assertEqual((manifest.rendered, manifest.skipped), (2, 0))
+        reason = manifest.reasons[os.path.join(self.public, "index.html")]
+        self.assertEqual(reason, f"template {os.path.normpath(self.template)} changed")
+
+        other = os.path.join(os.path.dirname(self.template), "blog.html")
+        write(other, "<h2>{{ Title }}</h2>{{ Content }}")
+        templates = {"blog": other}
+        manifest = BuildManifest.load(self.manifest_path, 1)
+        generate_pages_recursive(self.content, self.template, self.public, "/", manifest, templates=templates)
+        manifest.save()
+        self.assertEqual((manifest.rendered, manifest.skipped), (1, 1))
+        write(other, "<h3>{{ Title }}</h3>{{ Content }}")
+        manifest = BuildManifest.load(self.manifest_path, 1)
+        generate_pages_recursive(self.content, self.template, self.public, "/", manifest, templates=templates)
+        self.assertEqual((manifest.rendered, manifest.skipped), (1, 1))
+
+    def test_linked_static_file_change_rebuilds(self):
+        write(os.path.join(self.content, "index.md"), "# Home\n\n![logo](/images/logo.png)")
+        manifest = BuildManifest.load(self.manifest_path, 1)
+        manifest.assets = {os.path.join("images", "logo.png"): {"size": 1, "mtime_ns": 1}}
+        manifest.save()
+        self.build()
+        manifest = BuildManifest.load(self.manifest_path, 1)
+        manifest.assets[os.path.join("images", "logo.png")] = {"size": 2, "mtime_ns": 2}
+        self.assertEqual(list(manifest.pages_using_asset(os.path.join("images", "logo.png")).values()),
+                         [os.path.normpath(os.path.join(self.content, "index.md"))])
+        generate_pages_recursive(self.content, self.template, self.public, "/", manifest)
+        self.assertEqual((manifest.rendered, manifest.skipped), (1, 1))
+        reason = manifest.reasons[os.path.join(self.public, "index.html")]
+        self.assertEqual(reason, f"static file {os.path.join('images', 'logo.png')} changed")
+
+    def test_renderer_version_change_forces_full_rebuild(self):
+        self.build()
+        manifest = BuildManifest.load(self.manifest_path, 2)
+        self.assertTrue(manifest.needs_full_rebuild())
+        manifest.reset()
+        generate_pages_recursive(self.content, self.template, self.public, "/", manifest)
+        self.assertEqual((manifest.rendered, manifest.skipped), (2, 0))
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        manifest = self.build()
+        self.assertEqual(manifest.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_missing_output_is_stale(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        manifest = self.build()
+        self.assertEqual((manifest.rendered, manifest.skipped), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from metadata import MetadataIndex, listing_to_html_node, split_front_matter
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        md = '---\ntitle: "Hi: there"\ndate: 2024-01-02\ntags: [a, b]\ndraft: no\n---\n# Heading\n\ntext'
+        meta, body = split_front_matter(md)
+        self.assertEqual(meta, {"title": "Hi: there", "date": "2024-01-02", "tags": ["a", "b"], "draft": False})
+        self.assertEqual(body, "\n" * 6 + "# Heading\n\ntext")
+        self.assertEqual(split_front_matter("# Title\n---\n"), ({}, "# Title\n---\n"))
+
+    def test_invalid_front_matter(self):
+        for md in ("---\ntitle: x\n", "---\ndate: soon\n---\n", "---\njust text\n---\n"):
+            with self.assertRaises(ValueError):
+                split_front_matter(md)
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.sources = {
+            "blog/a.md": "---\ndate: 2024-01-01\ntags: ring\n---\n# Post A\n",
+            "blog/b/index.md": "---\ntitle: Post B\ndate: 2024-02-01\n---\nno heading",
+            "blog/draft.md": "---\ndraft: true\ntags: ring\n---\n# Draft\n",
+            "about.md": "---\ntags: [ring]\n---\n# About\n",
+            "blog/index.md": "---\nlist: blog\n---\n# Blog\n",
+        }
+        for rel_path, text in self.sources.items():
+            write(self.path(rel_path), text)
+        self.index = MetadataIndex()
+        self.index.load(os.path.join(self.tmp.name, "metadata.json"))
+        self.index.update([self.path(rel_path) for rel_path in self.sources], prune=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.content, rel_path)
+
+    def test_listing(self):
+        listing = self.index.listing("blog", self.path("blog/index.md"), self.content)
+        self.assertEqual(listing, [["/blog/b/", "Post B", "2024-02-01"], ["/blog/a.html", "Post A", "2024-01-01"]])
+        tagged = self.index.listing("tag:ring", self.path("blog/index.md"), self.content, drafts=True)
+        self.assertEqual([url for url, _, _ in tagged], ["/blog/a.html", "/about.html", "/blog/draft.html"])
+        self.assertEqual(
+            listing_to_html_node(listing[1:]).to_html(),
+            '<ul class="listing"><li><a href="/blog/a.html">Post A</a><time datetime="2024-01-01">2024-01-01</time></li></ul>',
+        )
+
+    def test_rescans_only_changed_sources(self):
+        self.index.save()
+        index = MetadataIndex()
+        index.load(self.index.path)
+        write(self.path("blog/a.md"), "# Renamed\n")
+        index.update([self.path(rel_path) for rel_path in self.sources if rel_path != "about.md"], prune=True)
+        self.assertEqual(index.scanned, 1)
+        self.assertEqual(index.get(self.path("blog/a.md")), {"title": "Renamed"})
+        self.assertEqual(index.get(self.path("about.md")), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import threading
+import unittest
+from page_writer import PageWriter, write_if_changed
+
+
+class TestPageWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_if_changed(self):
+        path = os.path.join(self.root, "page.html")
+        self.assertTrue(write_if_changed(path, b"one"))
+        os.utime(path, ns=(1, 1))
+        self.assertFalse(write_if_changed(path, b"one"))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+        self.assertTrue(write_if_changed(path, b"two"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"two")
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_writes_behind_and_counts(self):
+        paths = [os.path.join(self.root, f"dir{i % 3}", f"page{i}.html") for i in range(20)]
+        write_page = lambda path, html: write_if_changed(path, html.encode())
+        with PageWriter(write_page, threads=3, max_pending=4) as writer:
+            for path in paths:
+                writer.submit(path, os.path.basename(path))
+        self.assertEqual((writer.written, writer.unchanged), (20, 0))
+        with PageWriter(write_page, threads=3, max_pending=4) as writer:
+            for path in paths:
+                writer.submit(path, os.path.basename(path))
+        self.assertEqual((writer.written, writer.unchanged), (0, 20))
+        with open(paths[7]) as f:
+            self.assertEqual(f.read(), "page7.html")
+
+    def test_error_is_raised_on_close(self):
+        release = threading.Event()
+
+        def write_page(path, html):
+            release.wait()
+            raise OSError(f"cannot write {path}")
+
+        writer = PageWriter(write_page, threads=1)
+        writer.submit(os.path.join(self.root, "a.html"), "")
+        release.set()
+        with self.assertRaises(OSError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
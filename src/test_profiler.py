@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+import block
+import generate_page
+from htmlnode import ParentNode
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_install_and_uninstall(self):
+        originals = (block.markdown_to_blocks, generate_page.render_job)
+        profiler = Profiler()
+        profiler.install()
+        self.assertIsNot(block.markdown_to_blocks, originals[0])
+        self.assertIn("to_html", ParentNode.__dict__)
+        profiler.uninstall()
+        self.assertEqual((block.markdown_to_blocks, generate_page.render_job), originals)
+        self.assertNotIn("to_html", ParentNode.__dict__)
+
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Profiled\n\nSome **profiled** text\n\n- profiled a\n- profiled b")
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            block.block_cache.clear()
+            profiler = Profiler()
+            profiler.install()
+            try:
+                generate_page.generate_pages_recursive(content, template, os.path.join(root, "public"), "/")
+            finally:
+                profiler.uninstall()
+
+            summary = profiler.summary(1.0)
+            self.assertEqual(summary["pages"], 1)
+            self.assertEqual(summary["stages"]["classify"]["calls"], 3)
+            self.assertEqual(summary["stages"]["write"]["calls"], 1)
+            self.assertEqual(summary["slowest_pages"][0]["path"], os.path.join(content, "index.md"))
+            self.assertIn("Build profile: 1 pages", profiler.report(1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from block import block_to_html_node
+from render_cache import BlockCache
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = BlockCache()
+        first = cache.render("Shared **footer**", block_to_html_node)
+        second = cache.render("Shared **footer**", block_to_html_node)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first.to_html(), "<p>Shared <b>footer</b></p>")
+
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        for block in ("a", "b", "a", "c", "b"):
+            cache.render(block, block_to_html_node)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+        self.assertEqual(list(cache.entries), ["c", "b"])
+
+    def test_disk_store(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "cache", "blocks.pickle")
+            cache = BlockCache()
+            cache.load(path, 1)
+            cache.render("- one\n- two", block_to_html_node)
+            cache.save()
+
+            rendered = []
+
+            def render_block(block):
+                rendered.append(block)
+                return block_to_html_node(block)
+
+            cache = BlockCache()
+            cache.load(path, 1)
+            node = cache.render("- one\n- two", render_block)
+            self.assertEqual(node.to_html(), "<ul><li>one</li><li>two</li></ul>")
+            self.assertEqual(rendered, [])
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            cache.close()
+
+            cache = BlockCache()
+            cache.load(path, 2)
+            cache.render("- one\n- two", render_block)
+            self.assertEqual(rendered, ["- one\n- two"])
+
+    def test_prune_drops_unused_blocks(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.pickle")
+            cache = BlockCache()
+            cache.load(path, 1)
+            cache.render("old", block_to_html_node)
+            cache.save()
+            cache.load(path, 1)
+            cache.render("new", block_to_html_node)
+            cache.save(prune=True)
+            cache.load(path, 1)
+            self.assertEqual(len(cache.stored), 1)
+
+    def test_worker_usage_is_merged(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.pickle")
+            parent = BlockCache()
+            parent.load(path, 1)
+            worker = BlockCache()
+            worker.start_worker(path, 1)
+            worker.render("one", block_to_html_node)
+            worker.render("one", block_to_html_node)
+            parent.merge_usage(worker.take_usage())
+            worker.render("one", block_to_html_node)
+            worker.render("two", block_to_html_node)
+            hits, misses, used, fresh = worker.take_usage()
+            self.assertEqual((hits, misses, len(used), len(fresh)), (1, 1, 1, 1))
+            parent.merge_usage((hits, misses, used, fresh))
+            self.assertEqual((parent.hits, parent.misses), (2, 2))
+            parent.save(prune=True)
+            parent.load(path, 1)
+            self.assertEqual(len(parent.stored), 2)
+
+    def test_save_skipped_without_new_blocks(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.pickle")
+            cache = BlockCache()
+            cache.load(path, 1)
+            cache.render("one", block_to_html_node)
+            cache.save()
+            os.utime(path, ns=(0, 0))
+            cache.load(path, 1)
+            cache.render("one", block_to_html_node)
+            cache.save()
+            cache.save(prune=True)
+            cache.close()
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+
+    def test_store_limit_keeps_recent_blocks(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.pickle")
+            cache = BlockCache()
+            cache.load(path, 1)
+            cache.render("aaa", block_to_html_node)
+            cache.save()
+            size = cache.stored[next(iter(cache.stored))][1]
+            cache = BlockCache(store_limit=2 * size)
+            for block in ("bbb", "ccc"):
+                cache.load(path, 1)
+                cache.render(block, block_to_html_node)
+                cache.save()
+            cache.load(path, 1)
+            rendered = []
+
+            def render_block(block):
+                rendered.append(block)
+                return block_to_html_node(block)
+
+            for block in ("aaa", "bbb", "ccc"):
+                cache.render(block, render_block)
+            cache.close()
+            self.assertEqual(rendered, ["aaa"])
+    def test_new_blocks_are_appended(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.pickle")
+            data_path = os.path.join(root, "blocks.data")
+            cache = BlockCache()
+            cache.load(path, 1)
+            cache.render("one", block_to_html_node)
+            cache.save()
+            with open(data_path, "rb") as f:
+                first = f.read()
+            cache.load(path, 1)
+            cache.render("two", block_to_html_node)
+            cache.save()
+            with open(data_path, "rb") as f:
+                self.assertTrue(f.read().startswith(first))
+            cache.load(path, 1)
+            self.assertEqual(len(cache.stored), 2)
+
+            with open(data_path, "r+b") as f:
+                f.write(b"x" * 16)
+            cache.load(path, 1)
+            self.assertEqual(cache.stored, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+from block import render_blocks
+from manifest import BuildManifest
+from inline_scanner import scan_inline
+from search_index import page_terms, search_entry, token_terms, top_terms, write_search_index
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, rel_path):
+        with open(os.path.join(self.public, rel_path)) as f:
+            return json.load(f)
+
+    def test_page_terms_skip_code(self):
+        md = "# The Hobbit\n\nA **hobbit** lived in a hole.\n\n```python\nimport hobbit\n```"
+        terms = page_terms(terms for _, terms, _ in render_blocks(md))
+        self.assertEqual(terms, {"the": 1, "hobbit": 2, "lived": 1, "in": 1, "hole": 1})
+
+    def test_token_terms_skip_image_alt(self):
+        tokens = scan_inline("A `ring` and [Bag End](/bag-end) ![the map](/map.png)")
+        self.assertEqual(token_terms(tokens), "ring and bag end")
+
+    def test_write_search_index(self):
+        manifest = BuildManifest(self.manifest_path, 1)
+        pages = {
+            "index.html": search_entry("Home", {"hobbit": 1, "ring": 2}),
+            os.path.join("blog", "post", "index.html"): search_entry("Post", {"ring": 1, "1954": 1}),
+        }
+        for rel_path, search in pages.items():
+            dest_path = os.path.join(self.public, rel_path)
+            manifest.record(dest_path, "content", "", "template.html", "", "/site/", search=search)
+        files = write_search_index(manifest, self.public, "/site/")
+        self.assertEqual(
+            files, ["search/pages.json", "search/terms-1.json", "search/terms-h.json", "search/terms-r.json"],
+        )
+        self.assertEqual(self.read("search/pages.json"), [["/site/blog/post/", "Post"], ["/site/", "Home"]])
+        self.assertEqual(self.read("search/terms-r.json"), {"ring": [0, 1, 1, 2]})
+
+        del manifest.pages[os.path.join(self.public, "index.html")]
+        write_search_index(manifest, self.public, "/site/")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "terms-h.json")))
+        self.assertEqual(self.read("search/terms-r.json"), {"ring": [0, 1]})
+        self.assertNotIn("terms", manifest.pages[os.path.join(self.public, "blog", "post", "index.html")])
+
+    def test_unchanged_manifest_keeps_index(self):
+        manifest = BuildManifest(self.manifest_path, 1)
+        dest_path = os.path.join(self.public, "index.html")
+        manifest.record(dest_path, "content", "", "template.html", "", "/", search=search_entry("Home", {"ring": 1}))
+        write_search_index(manifest, self.public, "/")
+        manifest.save()
+        manifest = BuildManifest.load(self.manifest_path, 1)
+        os.remove(manifest.side_path(dest_path, ".terms"))
+        write_search_index(manifest, self.public, "/")
+        self.assertEqual(self.read("search/terms-r.json"), {"ring": [0, 1]})
+        os.remove(os.path.join(self.public, "search", "pages.json"))
+        write_search_index(manifest, self.public, "/")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "terms-r.json")))
+
+    def test_top_terms(self):
+        counts = {"b": 2, "a": 2, "c": 1, "d": 3}
+        self.assertEqual(top_terms(counts, 3), {"d": 3, "a": 2, "b": 2})
+        self.assertEqual(top_terms(counts, 4), counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from serve import diff_snapshots, snapshot, watch
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_diff_snapshots(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            template = os.path.join(root, "template.html")
+            for path in (template, os.path.join(content, "index.md"), os.path.join(content, "blog", "a.md")):
+                with open(path, "w") as f:
+                    f.write("x")
+            before = snapshot([content, template])
+            self.assertEqual(len(before), 3)
+
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("changed")
+            os.remove(os.path.join(content, "blog", "a.md"))
+            with open(os.path.join(content, "blog", "b.md"), "w") as f:
+                f.write("new")
+            changed, removed = diff_snapshots(before, snapshot([content, template]))
+            self.assertEqual(
+                sorted(changed),
+                [os.path.join(content, "blog", "b.md"), os.path.join(content, "index.md")],
+            )
+            self.assertEqual(removed, [os.path.join(content, "blog", "a.md")])
+
+    def test_paths_added_by_on_change_are_not_changes(self):
+        with tempfile.TemporaryDirectory() as root:
+            page, template = os.path.join(root, "page.md"), os.path.join(root, "post.html")
+            for path in (page, template):
+                with open(path, "w") as f:
+                    f.write("x")
+            paths = [page]
+            calls = []
+
+            def on_change(changed, removed):
+                calls.append(changed)
+                paths.append(template)
+                return "1 page(s)"
+
+            def edit_page():
+                with open(page, "w") as f:
+                    f.write("changed")
+
+            polls = iter([edit_page, lambda: None, lambda: None])
+
+            def sleep(interval):
+                poll = next(polls, None)
+                if poll is None:
+                    raise KeyboardInterrupt
+                poll()
+
+            with mock.patch("serve.time.sleep", sleep), mock.patch("builtins.print"):
+                with self.assertRaises(KeyboardInterrupt):
+                    watch(paths, on_change)
+            self.assertEqual(calls, [[page]])
+
+
+if __name__ == "__main__":
+    unittest.main()
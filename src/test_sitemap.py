@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from feeds import write_feeds
+from manifest import BuildManifest
+from metadata import metadata_index
+from sitemap import write_sitemap
+
+
+class TestSitemap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = self.tmp.name
+        self.manifest = BuildManifest("unused.json", 1)
+        for rel_path in ("index.html", os.path.join("blog", "index.html"), os.path.join("blog", "a b.html")):
+            self.manifest.record(os.path.join(self.public, rel_path), "content", "", "template.html", "", "/site/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, rel_path):
+        with open(os.path.join(self.public, rel_path)) as f:
+            return f.read()
+
+    def test_single_sitemap(self):
+        files = write_sitemap(self.manifest, self.public, "/site/", "https://example.com/")
+        self.assertEqual(files, ["sitemap.xml"])
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<loc>https://example.com/site/blog/a%20b.html</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/</loc>", sitemap)
+        self.assertIn("<urlset", sitemap)
+        self.assertEqual(sorted(os.listdir(self.public)), ["sitemap.xml"])
+
+    def test_sharded_sitemap(self):
+        files = write_sitemap(self.manifest, self.public, "/site/", "https://example.com", max_urls=2)
+        self.assertEqual(files, ["sitemap-1.xml", "sitemap-2.xml", "sitemap.xml"])
+        index = self.read("sitemap.xml")
+        self.assertIn("<sitemapindex", index)
+        self.assertIn("<loc>https://example.com/site/sitemap-2.xml</loc>", index)
+        self.assertEqual(self.read("sitemap-2.xml").count("<url>"), 1)
+
+        files = write_sitemap(self.manifest, self.public, "/site/", "https://example.com")
+        self.assertEqual(files, ["sitemap.xml"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "sitemap-1.xml")))
+
+
+    def test_unchanged_pages_keep_sitemap(self):
+        self.manifest.path = os.path.join(self.public, "manifest.json")
+        write_sitemap(self.manifest, self.public, "/site/", "https://example.com")
+        self.manifest.save()
+        files = write_sitemap(self.manifest, self.public, "/site/", "https://example.com", max_urls=2)
+        self.assertEqual(files, ["sitemap.xml"])
+
+        files = write_sitemap(self.manifest, self.public, "/site/", "https://example.org", max_urls=2)
+        self.assertEqual(files, ["sitemap-1.xml", "sitemap-2.xml", "sitemap.xml"])
+        self.assertIn("https://example.org/site/", self.read("sitemap-1.xml"))
+
+class TestFeeds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        sources = {
+            "blog/index.md": "---\nlist: blog\n---\n# Blog\n",
+            "blog/old.md": "---\ndate: 2024-01-01T09:30:00+02:00\n---\n# Old & odd\n",
+            "blog/new.md": "---\ndate: 2024-03-01\n---\n# New\n",
+            "blog/draft.md": "---\ndraft: true\n---\n# Draft\n",
+        }
+        self.manifest = BuildManifest("unused.json", 1)
+        for rel_path, text in sources.items():
+            path = os.path.join(self.content, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text)
+            dest_path = os.path.join(self.public, rel_path[: -len(".md")] + ".html")
+            listing_hash = "x" if rel_path == "blog/index.md" else None
+            self.manifest.record(dest_path, path, "", "template.html", "", "/site/", listing_hash=listing_hash)
+        metadata_index.load(os.path.join(self.tmp.name, "metadata.json"))
+        metadata_index.update([os.path.join(self.content, rel_path) for rel_path in sources], prune=True)
+
+    def tearDown(self):
+        metadata_index.entries = {}
+        metadata_index.path = None
+        self.tmp.cleanup()
+
+    def test_write_feeds(self):
+        files = write_feeds(self.manifest, self.public, "/site/", "https://example.com", self.content)
+        self.assertEqual(files, ["blog/feed.xml"])
+        with open(os.path.join(self.public, "blog", "feed.xml")) as f:
+            feed = f.read()
+        self.assertIn('<link rel="self" href="https://example.com/site/blog/feed.xml"/>', feed)
+        self.assertIn("<updated>2024-03-01T00:00:00Z</updated>", feed)
+        self.assertLess(feed.index("/site/blog/new.html"), feed.index("/site/blog/old.html"))
+        self.assertIn("<title>Old &amp; odd</title>", feed)
+        self.assertNotIn("Draft", feed)
+        self.assertIn("<author><name>example.com</name></author>", feed)
+        self.assertIn("<updated>2024-01-01T07:30:00Z</updated>", feed)
+
+    def test_feed_author(self):
+        url = "https://example.com"
+        write_feeds(self.manifest, self.public, "/site/", url, self.content, site_author="Tom & Jerry")
+        with open(os.path.join(self.public, "blog", "feed.xml")) as f:
+            self.assertIn("<author><name>Tom &amp; Jerry</name></author>", f.read())
@@ -1,5 +1,6 @@
+import io
 import unittest
-from splitblocks import markdown_to_blocks
+from splitblocks import iter_blocks, markdown_to_blocks
 
 class TestSplitBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -20,4 +21,13 @@ This is the same paragraph on a new line
                 "This is another paragraph with _italic_ text and `code` here\nThis is the same paragraph on a new line",
                 "- This is a list\n- with items",
             ],
-        )
\ No newline at end of file
+        )
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        self.assertEqual(markdown_to_blocks(md), ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"])
+
+    def test_iter_blocks_from_file(self):
+        fp = io.StringIO("\n\n# Title\n   \nSome text\nmore text\n\n\n\n- item\n")
+        self.assertEqual(list(iter_blocks(fp)), ["# Title", "Some text\nmore text", "- item"])
+
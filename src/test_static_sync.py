@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from static_sync import sync_static
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_copies_only_changed_files(self):
+        stats, assets = sync_static(self.static, self.public)
+        self.assertEqual((stats.copied, stats.skipped), (2, 0))
+        self.assertEqual(stats.bytes_copied, len("body {}") + len("png bytes"))
+
+        stats, assets = sync_static(self.static, self.public, assets)
+        self.assertEqual((stats.copied, stats.skipped, stats.bytes_copied), (0, 2, 0))
+
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        stats, assets = sync_static(self.static, self.public, assets)
+        self.assertEqual((stats.copied, stats.skipped), (1, 1))
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_removes_orphans_but_keeps_pages(self):
+        _, assets = sync_static(self.static, self.public)
+        self.write(os.path.join(self.public, "index.html"), "<p>page</p>")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        stats, assets = sync_static(self.static, self.public, assets)
+        self.assertEqual(stats.removed, 1)
+        self.assertEqual(list(assets), ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_checksum_skips_touched_files(self):
+        _, assets = sync_static(self.static, self.public)
+        os.utime(os.path.join(self.static, "index.css"), ns=(0, 10**9))
+        stats, _ = sync_static(self.static, self.public, assets, checksum=True)
+        self.assertEqual(stats.copied, 0)
+
+    def test_fingerprint(self):
+        _, assets = sync_static(self.static, self.public, fingerprint=True)
+        output = assets["index.css"]["output"]
+        self.assertRegex(output, r"^index\.[0-9a-f]{12}\.css$")
+        self.assertTrue(os.path.exists(os.path.join(self.public, output)))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        stats, assets = sync_static(self.static, self.public, assets, fingerprint=True)
+        self.assertEqual((stats.copied, stats.removed), (1, 1))
+        self.assertNotEqual(assets["index.css"]["output"], output)
+        self.assertFalse(os.path.exists(os.path.join(self.public, output)))
+
+        stats, assets = sync_static(self.static, self.public, assets)
+        self.assertEqual((stats.copied, stats.removed), (2, 2))
+        self.assertEqual(sorted(os.listdir(self.public)), ["images", "index.css"])
+
+    def test_hardlinks(self):
+        sync_static(self.static, self.public, link="hard")
+        src = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(src.st_ino, dest.st_ino)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import unittest
+from generate_page import render_page
+from htmlnode import LeafNode, ParentNode
+from template import Template, TemplateCache, basepath_rewriter, select_template
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css" /><a href="https://x.dev/">x</a>{{ Content }}{{ Unknown }}'
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template(TEMPLATE)
+        html = template.render({"Title": "Home", "Content": "<p>hi</p>"})
+        self.assertEqual(
+            html,
+            '<title>Home</title><link href="/index.css" /><a href="https://x.dev/">x</a><p>hi</p>{{ Unknown }}',
+        )
+
+    def test_basepath_only_rewrites_attributes(self):
+        template = Template(TEMPLATE)
+        html = template.render({"Title": "Home", "Content": 'href="/raw'}, basepath_rewriter("/site/"))
+        self.assertIn('<link href="/site/index.css" />', html)
+        self.assertIn('<a href="https://x.dev/">', html)
+        self.assertIn('</a>href="/raw', html)
+
+    def test_render_page_rewrites_content_links_not_code(self):
+        template = Template("{{ Content }}")
+        md = '# T\n\n[home](/) and ![img](/a.png) and `href="/nope"`'
+        html = render_page(md, template, "/site/")
+        self.assertEqual(
+            html,
+            '<div><h1>T</h1><p><a href="/site/">home</a> and <img src="/site/a.png" alt="img"> and <code>href="/nope"</code></p></div>',
+        )
+
+    def test_stream_matches_render(self):
+        template = Template(TEMPLATE)
+        node = ParentNode("p", [LeafNode("a", "home", {"href": "/"})])
+        rewrite_url = basepath_rewriter("/site/")
+        buffer = io.StringIO()
+        template.stream(buffer.write, {"Title": "T", "Content": node}, rewrite_url)
+        expected = template.render({"Title": "T", "Content": node.to_html(rewrite_url)}, rewrite_url)
+        self.assertEqual(buffer.getvalue(), expected)
+
+    def test_select_template(self):
+        templates = {"blog": "blog.html", "blog/tom": "tom.html"}
+        self.assertEqual(select_template("content/index.md", "content", "t.html", templates), "t.html")
+        self.assertEqual(select_template("content/blog/a/index.md", "content", "t.html", templates), "blog.html")
+        self.assertEqual(select_template("content/blog/tom/index.md", "content", "t.html", templates), "tom.html")
+        self.assertEqual(select_template("content/blogger.md", "content", "t.html", templates), "t.html")
+
+    def test_cache_reloads_changed_template(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            cache = TemplateCache()
+            first = cache.load(path)
+            self.assertIs(cache.load(path), first)
+            with open(path, "w") as f:
+                f.write("<main>{{ Content }}</main>")
+            os.utime(path, ns=(0, 10**9))
+            self.assertEqual(cache.load(path).render({"Content": "x"}), "<main>x</main>")
+
+
+if __name__ == "__main__":
+    unittest.main()
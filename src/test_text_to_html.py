@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, text_node_to_html_node, token_to_html_node
 
 class TextToHTML(unittest.TestCase):
     def test_text(self):
@@ -17,4 +17,10 @@ class TextToHTML(unittest.TestCase):
         node = TextNode("This is a text node", TextType.LINK)
         html_node = text_node_to_html_node(node)
         self.assertEqual(html_node.tag, "a")
-        self.assertEqual(html_node.value, "This is a text node")
\ No newline at end of file
+        self.assertEqual(html_node.value, "This is a text node")
+
+    def test_token(self):
+        html_node = token_to_html_node(TextType.IMAGE, "alt text", "/a.png")
+        self.assertEqual(html_node.to_html(), '<img src="/a.png" alt="alt text">')
+        html_node = token_to_html_node(TextType.BOLD, "bold")
+        self.assertEqual(html_node.to_html(), "<b>bold</b>")
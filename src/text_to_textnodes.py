@@ -1,8 +1,14 @@
 from splitnodes import split_nodes_delimiter, split_nodes_link, split_nodes_image
 from textnode import TextNode, TextType
-from markdown_extract import extract_markdown_images
+from inline_scanner import scan_inline
 
 def text_to_textnodes(text): 
+    return [TextNode(value, text_type, url) for text_type, value, url in scan_inline(text)]
+
+
+# Reference implementation: one full pass per delimiter, image and link. Kept
+# for the differential tests that pin scan_inline to the same output.
+def text_to_textnodes_split(text): 
     nodes = [TextNode(text, TextType.TEXT)]
 
     nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
@@ -13,20 +19,3 @@ def text_to_textnodes(text):
 
 
     return nodes 
-
-# text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
-
-# new_nodes = text_to_textnodes(text)
-
-# print(new_nodes)
-
-
-# md = """
-# ```
-# This is text that _should_ remain
-# the **same** even with inline stuff
-# ```
-# """
-# new_nodes = text_to_textnodes(md)
-
-# print(new_nodes)
\ No newline at end of file
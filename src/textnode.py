@@ -1,5 +1,6 @@
 from enum import Enum
 from htmlnode import LeafNode
+from image_size import image_sizes
 
 class TextType(Enum):
     TEXT = "text"
@@ -10,6 +11,8 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode: 
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self,text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -26,16 +29,40 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
 
+TEXT_TYPE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
+# The width and height are looked up when the tag is written, not when the
+# node is built: rendered blocks are cached across builds, and an image can
+# change without the markdown that shows it changing.
+class ImageNode(LeafNode):
+    __slots__ = ()
+
+    def __init__(self, src, alt):
+        super().__init__("img", None, {"src": src, "alt": alt})
+
+    def to_html(self, rewrite_url=None):
+        size = image_sizes.get(self.props["src"])
+        if size is None:
+            return f"<img{self.props_to_html(rewrite_url)}>"
+        return f'<img{self.props_to_html(rewrite_url)} width="{size[0]}" height="{size[1]}">'
+
+    def __reduce__(self):
+        return ImageNode, (self.props["src"], self.props["alt"])
+
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", None, {"src": text_node.url, "alt": text_node.text})
\ No newline at end of file
+    return token_to_html_node(text_node.text_type, text_node.text, text_node.url)
+
+# Builds the leaf straight from a (text_type, text, url) token as produced by
+# scan_inline, so inline text does not need a TextNode per span first.
+def token_to_html_node(text_type, text, url=None):
+    if text_type in TEXT_TYPE_TAGS:
+        return LeafNode(TEXT_TYPE_TAGS[text_type], text)
+    elif text_type == TextType.LINK:
+        return LeafNode("a", text, {"href": url})
+    elif text_type == TextType.IMAGE:
+        return ImageNode(url, text)